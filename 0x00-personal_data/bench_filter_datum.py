@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmarks `filter_datum` against the original per-field `re.sub` loop
+on the rows of `user_data.csv`.
+"""
+import csv
+import re
+import timeit
+from typing import List
+
+from filtered_logger import PII_FIELDS, filter_datum
+
+
+def legacy_filter_datum(fields: List[str], redaction: str,
+                        message: str, separator: str) -> str:
+    """
+    Original implementation: one `re.sub` per field.
+    """
+    for field in fields:
+        message = re.sub(field+'=.*?'+separator,
+                         field+'='+redaction+separator, message)
+    return message
+
+
+def load_messages(file_path: str = "user_data.csv") -> List[str]:
+    """
+    Returns the rows of `file_path` formatted as log messages.
+    """
+    with open(file_path, newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        return ["".join("{}={}; ".format(k, v) for k, v in zip(columns, row))
+                for row in reader]
+
+
+def run(repeat: int = 5) -> None:
+    """
+    Prints the best time of `repeat` runs for both implementations.
+    """
+    messages = load_messages()
+    # Multi-line values, empty values and missing fields
+    checks = messages + ["name=a\nb; email=; x=1;", "ip=1; password=p"]
+    for message in checks:
+        assert filter_datum(PII_FIELDS, "***", message, ";") == \
+            legacy_filter_datum(PII_FIELDS, "***", message, ";")
+
+    for name, func in (("legacy", legacy_filter_datum),
+                       ("compiled", filter_datum)):
+        best = min(timeit.repeat(
+            lambda: [func(PII_FIELDS, "***", m, ";") for m in messages],
+            number=10, repeat=repeat))
+        per_line = best / (10 * len(messages)) * 1e6
+        print("{:<12} {:8.2f} us/line".format(name, per_line))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmarks connection-acquire latency of a fresh connection per call
+against `ConnectionPool`, using a fake connector that simulates the
+TCP and authentication handshake.
+"""
+import time
+from typing import Callable
+
+from filtered_logger import ConnectionPool
+
+
+HANDSHAKE = 0.002
+
+
+class FakeConnection:
+    """
+    Connection whose creation costs one simulated handshake.
+    """
+
+    def __init__(self):
+        time.sleep(HANDSHAKE)
+        self.open = True
+
+    def is_connected(self) -> bool:
+        """
+        Returns `True` until the connection is closed.
+        """
+        return self.open
+
+    def rollback(self) -> None:
+        """
+        Rolls back the (empty) current transaction.
+        """
+
+    def close(self) -> None:
+        """
+        Closes the connection.
+        """
+        self.open = False
+
+
+def measure(acquire: Callable, n: int = 500) -> float:
+    """
+    Returns the mean latency in microseconds of `n` acquire/release
+    cycles.
+    """
+    start = time.perf_counter()
+    for _ in range(n):
+        acquire()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run() -> None:
+    """
+    Prints the mean acquire latency of both paths.
+    """
+    def fresh():
+        FakeConnection().close()
+
+    pool = ConnectionPool(connect=FakeConnection, size=5)
+
+    def pooled():
+        with pool.connection():
+            pass
+
+    print("{:<8} {:10.1f} us/acquire".format("fresh", measure(fresh)))
+    print("{:<8} {:10.1f} us/acquire".format("pooled", measure(pooled)))
+    pool.close()
+
+
+if __name__ == "__main__":
+    run()
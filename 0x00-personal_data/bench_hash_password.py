@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Benchmarks sequential bcrypt hashing against `HashingService` backed by
+threads and by processes.
+"""
+import time
+
+from encrypt_password import HashingService, hash_password, is_valid
+
+
+def run(n: int = 32) -> None:
+    """
+    Prints the hashes/second of each strategy for `n` passwords.
+    """
+    passwords = ["Passw0rd{}".format(i) for i in range(n)]
+
+    start = time.perf_counter()
+    hashes = [hash_password(p) for p in passwords]
+    assert all(is_valid(h, p) for h, p in zip(hashes, passwords))
+    elapsed = time.perf_counter() - start
+    print("{:<10} {:8.1f} ops/s".format("sequential", 2 * n / elapsed))
+
+    for name, processes in (("threads", False), ("processes", True)):
+        with HashingService(processes=processes) as service:
+            start = time.perf_counter()
+            hashes = service.hash_many(passwords)
+            assert all(service.verify_many(zip(hashes, passwords)))
+            elapsed = time.perf_counter() - start
+        print("{:<10} {:8.1f} ops/s".format(name, 2 * n / elapsed))
+
+
+if __name__ == "__main__":
+    run()
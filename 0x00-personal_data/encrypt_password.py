@@ -2,18 +2,31 @@
 """
 Encrypting and validating passwords for safe storage.
 """
+from concurrent.futures import Future, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
+import os
+import time
 import bcrypt
 
 
-def hash_password(password: str) -> bytes:
+try:
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+except ValueError:
+    BCRYPT_ROUNDS = 12
+
+
+def hash_password(password: str, rounds: int = None) -> bytes:
     """
     Returns a salted, hashed password.
 
     Arguments:
     - `password`: Password to be hashed.
+    - `rounds`: bcrypt cost factor, `BCRYPT_ROUNDS` by default.
     """
     b_password = password.encode()
-    hashed = bcrypt.hashpw(b_password, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(b_password, bcrypt.gensalt(rounds or BCRYPT_ROUNDS))
     return hashed
 
 
@@ -27,3 +40,157 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
     - `password`: Normal password.
     """
     return bcrypt.checkpw(password.encode(), hashed_password)
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """
+    Returns the bcrypt cost factor `hashed_password` was created with.
+
+    Arguments:
+    - `hashed_password`: Hashed password.
+    """
+    return int(hashed_password.split(b'$')[2])
+
+
+def needs_rehash(hashed_password: bytes, rounds: int = None) -> bool:
+    """
+    Returns `True` if `hashed_password` was not created with the
+    current cost factor.
+
+    Arguments:
+    - `hashed_password`: Hashed password.
+    - `rounds`: Expected cost factor, `BCRYPT_ROUNDS` by default.
+    """
+    return hash_rounds(hashed_password) != (rounds or BCRYPT_ROUNDS)
+
+
+def verify_and_update(hashed_password: bytes,
+                      password: str) -> Tuple[bool, Optional[bytes]]:
+    """
+    Returns whether `password` matches `hashed_password` and, when it
+    does but the hash uses an outdated cost factor, a new hash to store
+    in place of the old one (else `None`).
+
+    Arguments:
+    - `hashed_password`: Hashed password.
+    - `password`: Normal password.
+    """
+    if not is_valid(hashed_password, password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, hash_password(password)
+    return True, None
+
+
+def calibrate_rounds(target: float = 0.05, min_rounds: int = 4,
+                     max_rounds: int = 20, apply: bool = False) -> int:
+    """
+    Returns the highest bcrypt cost factor whose hashing time on this
+    machine stays within `target` seconds.
+
+    Each extra round doubles the hashing time, so costs are timed upward
+    from `min_rounds` until the next one would exceed `target`.
+
+    Arguments:
+    - `target`: Wanted hashing latency in seconds.
+    - `min_rounds`: Lowest cost factor returned.
+    - `max_rounds`: Highest cost factor returned.
+    - `apply`: Make the result the new `BCRYPT_ROUNDS`.
+    """
+    global BCRYPT_ROUNDS
+    rounds = min_rounds
+    while rounds < max_rounds:
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds))
+        if (time.perf_counter() - start) * 2 > target:
+            break
+        rounds += 1
+    if apply:
+        BCRYPT_ROUNDS = rounds
+    return rounds
+
+
+class HashingService:
+    """
+    Runs `hash_password` and `is_valid` on a pool of workers so that
+    bulk imports and login bursts use every core.
+
+    bcrypt releases the GIL while hashing, so threads (the default) scale
+    across cores without the pickling cost of processes.
+    """
+
+    def __init__(self, workers: int = None, processes: bool = False):
+        """
+        Arguments:
+        - `workers`: Number of workers, one per CPU by default.
+        - `processes`: Use a process pool instead of a thread pool.
+        """
+        workers = workers or os.cpu_count() or 1
+        if processes:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit_hash(self, password: str) -> Future:
+        """
+        Returns a Future of the salted, hashed `password`.
+
+        Arguments:
+        - `password`: Password to be hashed.
+        """
+        return self._executor.submit(hash_password, password, BCRYPT_ROUNDS)
+
+    def submit_verify(self, hashed_password: bytes, password: str) -> Future:
+        """
+        Returns a Future of whether `password` matches `hashed_password`.
+
+        Arguments:
+        - `hashed_password`: Hashed password.
+        - `password`: Normal password.
+        """
+        return self._executor.submit(is_valid, hashed_password, password)
+
+    def hash_many(self, passwords: Iterable[str]) -> List[bytes]:
+        """
+        Returns the salted, hashed `passwords`, in order.
+
+        Arguments:
+        - `passwords`: Passwords to be hashed.
+        """
+        return list(self._executor.map(
+            partial(hash_password, rounds=BCRYPT_ROUNDS), passwords))
+
+    def verify_many(
+            self, pairs: Iterable[Tuple[bytes, str]]) -> List[bool]:
+        """
+        Returns, in order, whether each password matches its hash.
+
+        Arguments:
+        - `pairs`: `(hashed_password, password)` tuples.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return []
+        hashes, passwords = zip(*pairs)
+        return list(self._executor.map(is_valid, hashes, passwords))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the workers.
+
+        Arguments:
+        - `wait`: Wait for pending hashes to complete.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "HashingService":
+        """
+        Returns the service for use in a `with` block.
+        """
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """
+        Stops the workers when leaving a `with` block.
+        """
+        self.shutdown()
@@ -2,9 +2,20 @@
 """
 Obfuscating/filtering Personally Identifiable Information (PII)
 """
-from typing import List
+from typing import Callable, Iterable, Iterator, List, TextIO, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+import atexit
+import time
+import queue
 import re
+import threading
 import logging
+import logging.handlers
 import os
 import mysql.connector
 
@@ -23,12 +34,110 @@ def filter_datum(fields: List[str], redaction: str,
     - `message`: The log line to obfuscate
     - `separator`: The character separating the fields in message
     """
-    for field in fields:
-        message = re.sub(field+'=.*?'+separator,
-                         field+'='+redaction+separator, message)
+    for key, pattern, replacement in _redaction_patterns(
+            tuple(fields), redaction, separator):
+        if key in message:
+            message = pattern.sub(replacement, message)
     return message
 
 
+@lru_cache(maxsize=128)
+def _redaction_patterns(fields: Tuple[str, ...], redaction: str,
+                        separator: str) -> Tuple[tuple, ...]:
+    """
+    Returns the `field=` key, compiled pattern and replacement of each of
+    `fields`.
+
+    Each pattern starts with a literal, which `re` finds with a fast
+    substring search, and a single-character separator is matched with a
+    negated class instead of a lazy `.*?`, so no backtracking happens.
+    Fields whose key isn't in the message are skipped.
+
+    Arguments:
+    - `fields`: Fields in message to obfuscate
+    - `redaction`: What the field will be obfuscated with
+    - `separator`: The character separating the fields in message
+    """
+    if len(separator) == 1:
+        value = '[^{}\\n]*'.format(re.escape(separator))
+    else:
+        value = '.*?'
+    return tuple(
+        (field + '=',
+         re.compile(re.escape(field) + '=' + value + re.escape(separator)),
+         (field + '=' + redaction + separator).replace('\\', '\\\\'))
+        for field in fields)
+
+
+def _filter_chunk(fields: Tuple[str, ...], redaction: str,
+                  separator: str, chunk: List[str]) -> List[str]:
+    """
+    Returns the obfuscated lines of `chunk`.
+    """
+    return [filter_datum(fields, redaction, line, separator)
+            for line in chunk]
+
+
+def filter_stream(lines: Iterable[str], fields: List[str],
+                  redaction: str = "***", separator: str = ";",
+                  chunk_size: int = 1000,
+                  workers: int = 0) -> Iterator[str]:
+    """
+    Lazily yields the obfuscated version of each line in `lines`,
+    in the same order as the input.
+
+    Lines are consumed in chunks of `chunk_size`. With `workers` > 0,
+    chunks are redacted in a process pool with at most two chunks per
+    worker in flight, so memory stays bounded whatever the input size.
+
+    Arguments:
+    - `lines`: Iterable of log lines to obfuscate
+    - `fields`: Fields in lines to obfuscate
+    - `redaction`: What the field will be obfuscated with
+    - `separator`: The character separating the fields in a line
+    - `chunk_size`: Number of lines redacted per unit of work
+    - `workers`: Number of worker processes, 0 to redact in-process
+    """
+    fields = tuple(fields)
+    iterator = iter(lines)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    if workers <= 0:
+        for chunk in chunks:
+            yield from _filter_chunk(fields, redaction, separator, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(
+                _filter_chunk, fields, redaction, separator, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def dump_stream(lines: Iterable[str], fields: List[str], output: TextIO,
+                **kwargs) -> int:
+    """
+    Writes the obfuscated version of `lines` to `output` and returns
+    the number of lines written.
+
+    Arguments:
+    - `lines`: Iterable of log lines to obfuscate
+    - `fields`: Fields in lines to obfuscate
+    - `output`: Writable file object receiving the obfuscated lines
+    - `kwargs`: Extra keyword arguments passed to `filter_stream`
+    """
+    count = 0
+    chunk_size = kwargs.get("chunk_size", 1000)
+    redacted = filter_stream(lines, fields, **kwargs)
+    for chunk in iter(lambda: list(islice(redacted, chunk_size)), []):
+        output.writelines(chunk)
+        count += len(chunk)
+    return count
+
+
 class RedactingFormatter(logging.Formatter):
     """
     Redacting Formatter class
@@ -41,6 +150,7 @@ class RedactingFormatter(logging.Formatter):
     def __init__(self, fields: List[str]):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self.field_set = frozenset(fields)
 
     def format(self, record: logging.LogRecord) -> str:
         """
@@ -48,19 +158,157 @@ class RedactingFormatter(logging.Formatter):
         and returns filtered message.
 
         Arguments:
-        - `record`: LogRecord instance containing message.
+        - `record`: LogRecord instance containing message. Structured
+          records are obfuscated by field name without any regex (see
+          `serialize`).
         """
+        if is_structured(record):
+            msg = record.msg
+            record.msg = self.serialize(msg, getattr(record, "columns", None))
+            try:
+                return super(RedactingFormatter, self).format(record)
+            finally:
+                record.msg = msg
         message = super(RedactingFormatter, self).format(record)
         filtered_message = filter_datum(
             self.fields, self.REDACTION, message, self.SEPARATOR)
         return filtered_message
 
+    def serialize(self, row, columns: List[str] = None) -> str:
+        """
+        Returns `row` as the `key=value; ` message built by `main`, with
+        the values of `fields` replaced by the redaction.
 
-def get_logger() -> logging.Logger:
+        Arguments:
+        - `row`: Mapping of field names to values, sequence of
+          `(field, value)` pairs, or sequence of values if `columns`
+          is given
+        - `columns`: Field names of the values in `row`
+        """
+        if isinstance(row, Mapping):
+            items = row.items()
+        elif columns is not None:
+            items = zip(columns, row)
+        else:
+            items = row
+        field_set = self.field_set
+        redaction = self.REDACTION
+        separator = self.SEPARATOR
+        return "".join(
+            "{}={}{} ".format(k, redaction if k in field_set else v,
+                              separator)
+            for k, v in items).strip()
+
+
+def is_structured(record: logging.LogRecord) -> bool:
+    """
+    Returns `True` if `record` was logged with a dict or tuple row as
+    message instead of a string. A tuple is only a row if the record has
+    `columns`, or if it holds `(field, value)` pairs: other tuples are
+    logged as their `str()`, as before.
+
+    Arguments:
+    - `record`: LogRecord instance to inspect.
+    """
+    msg = record.msg
+    if record.args:
+        return False
+    if isinstance(msg, Mapping):
+        return True
+    if not isinstance(msg, tuple):
+        return False
+    if getattr(record, "columns", None) is not None:
+        return True
+    return bool(msg) and all(
+        type(item) is tuple and len(item) == 2 for item in msg)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler with a bounded queue that either blocks the caller
+    or drops the record when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool = False):
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.block = block
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Keeps structured rows intact for the listener's formatter instead
+        of flattening them to their `str()`, which would defeat their
+        redaction.
+
+        Arguments:
+        - `record`: LogRecord instance to hand over to the listener.
+        """
+        if is_structured(record):
+            return record
+        return super(BoundedQueueHandler, self).prepare(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Puts `record` on the queue according to the full-queue policy.
+
+        Arguments:
+        - `record`: LogRecord instance to hand over to the listener.
+        """
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BlockingSentinelListener(logging.handlers.QueueListener):
+    """
+    QueueListener that waits for room on a full queue when stopping,
+    so that records already queued are still flushed.
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """
+        Puts the stop sentinel on the queue, blocking if it is full.
+        """
+        self.queue.put(self._sentinel)
+
+
+_listener = None
+
+
+def _stop_listener() -> None:
+    """
+    Flushes and stops the background logging listener, if any.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(asynchronous: bool = False, queue_size: int = 10000,
+               block: bool = False) -> logging.Logger:
     """
     Returns a logging.Logger object.
+
+    Repeated calls return the already configured logger without adding
+    another handler.
+
+    Arguments:
+    - `asynchronous`: Hand records over to a background thread that does
+      the redaction and the I/O instead of the calling thread
+    - `queue_size`: Maximum number of records waiting for the background
+      thread, 0 for no limit
+    - `block`: Block the caller when the queue is full instead of
+      dropping the record
     """
+    global _listener
     logger = logging.getLogger("user_data")
+    if logger.handlers:
+        return logger
     logger.setLevel(logging.INFO)
     logger.propagate = False
 
@@ -68,6 +316,14 @@ def get_logger() -> logging.Logger:
     formatter = RedactingFormatter(PII_FIELDS)
     handler.setFormatter(formatter)
 
+    if asynchronous:
+        log_queue = queue.Queue(maxsize=queue_size)
+        _listener = BlockingSentinelListener(
+            log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        handler = BoundedQueueHandler(log_queue, block=block)
+
     logger.addHandler(handler)
     return logger
 
@@ -85,20 +341,209 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     return connector
 
 
-def main():
+class ConnectionPool:
+    """
+    Bounded pool of reusable database connections.
+
+    Idle connections are kept in release order and checked out most
+    recently used first. On checkout, connections idle for longer than
+    `max_idle` seconds are closed and connections failing the health
+    check are replaced.
+    """
+
+    def __init__(self, connect: Callable = None, size: int = 5,
+                 max_idle: float = 300.0, check: Callable = None):
+        """
+        Arguments:
+        - `connect`: Callable opening a new connection, `get_db` by default
+        - `size`: Maximum number of connections checked out at once
+        - `max_idle`: Seconds after which an idle connection is evicted
+        - `check`: Callable returning `True` if a connection is usable,
+          `is_connected()` by default
+        """
+        self.connect = connect or get_db
+        self.size = size
+        self.max_idle = max_idle
+        self.check = check or (lambda conn: conn.is_connected())
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout: float = None):
+        """
+        Returns a healthy connection, opening one if none is idle.
+
+        Arguments:
+        - `timeout`: Seconds to wait for a free slot, forever if `None`
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("connection pool exhausted")
+        try:
+            while True:
+                stale = []
+                conn = None
+                with self._lock:
+                    now = time.monotonic()
+                    while self._idle and \
+                            now - self._idle[0][1] > self.max_idle:
+                        stale.append(self._idle.popleft()[0])
+                    if self._idle:
+                        conn = self._idle.pop()[0]
+                for stale_conn in stale:
+                    self._close(stale_conn)
+                if conn is None:
+                    return self.connect()
+                if self._healthy(conn):
+                    return conn
+                self._close(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard: bool = False) -> None:
+        """
+        Returns `conn` to the pool, rolled back so that no open
+        transaction or unread result reaches the next borrower.
+
+        Arguments:
+        - `conn`: Connection previously returned by `acquire`
+        - `discard`: Close `conn` instead of keeping it, e.g. after an
+          error left it in an unknown state
+        """
+        try:
+            if not discard:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+            if discard:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """
+        Context manager checking a connection out of the pool and
+        returning it on exit, or closing it if the body raised.
+
+        Arguments:
+        - `timeout`: Seconds to wait for a free slot, forever if `None`
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, discard=True)
+            raise
+        self.release(conn)
+
+    def close(self) -> None:
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _healthy(self, conn) -> bool:
+        """
+        Returns `True` if `conn` passes the health check.
+        """
+        try:
+            return bool(self.check(conn))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn) -> None:
+        """
+        Closes `conn`, ignoring errors from dead connections.
+        """
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@contextmanager
+def pooled_db():
+    """
+    Context manager yielding a pooled connector to the database.
+
+    The pool reads the same `PERSONAL_DATA_DB_*` variables as `get_db`,
+    plus `PERSONAL_DATA_DB_POOL_SIZE` (default 5) and
+    `PERSONAL_DATA_DB_POOL_MAX_IDLE` in seconds (default 300).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=int(os.getenv("PERSONAL_DATA_DB_POOL_SIZE", "5")),
+                    max_idle=float(os.getenv(
+                        "PERSONAL_DATA_DB_POOL_MAX_IDLE", "300")))
+    with _pool.connection() as conn:
+        yield conn
+
+
+def dump_rows(cursor, logger: logging.Logger,
+              batch_size: int = 1000) -> int:
+    """
+    Logs the filtered rows of an executed `cursor` and returns the
+    number of rows logged.
+
+    Rows are fetched `batch_size` at a time, so an unbuffered cursor
+    (the default for `mysql.connector`) streams the result set with a
+    flat memory footprint. Each row is logged as a structured record
+    with its column names, which the logger's formatter redacts by
+    field name.
+
+    Arguments:
+    - `cursor`: DB-API cursor on which a query has been executed
+    - `logger`: Logger receiving one record per row
+    - `batch_size`: Number of rows fetched per round trip
+    """
+    extra = {"columns": [d[0] for d in cursor.description]}
+    count = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            logger.info(tuple(row), extra=extra)
+        count += len(rows)
+    return count
+
+
+def main(batch_size: int = 1000, report: bool = False):
     """
     Connects and displays filtered database results.
+
+    Arguments:
+    - `batch_size`: Number of rows fetched per round trip
+    - `report`: Print the number of rows and rows/second once done
     """
     db = get_db()
     logger = get_logger()
     cursor = db.cursor()
+    start = time.perf_counter()
     cursor.execute("SELECT * FROM users;")
-    fields = cursor.column_names
-    for row in cursor:
-        message = "".join("{}={}; ".format(k, v) for k, v in zip(fields, row))
-        logger.info(message.strip())
+    count = dump_rows(cursor, logger, batch_size)
+    elapsed = time.perf_counter() - start
     cursor.close()
     db.close()
+    if report:
+        print("{} rows in {:.2f}s ({:.0f} rows/s)".format(
+            count, elapsed, count / elapsed if elapsed else 0))
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 Route module for the API
 """
 from os import getenv
+from api.v1.auth.auth import PathMatcher
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
@@ -22,6 +23,14 @@ elif AUTH_TYPE == 'basic_auth':
     auth = BasicAuth()
 
 
+# Paths served without authentication, compiled once
+EXCLUDED_PATHS = PathMatcher([
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/'
+])
+
+
 @app.before_request
 def filter_request():
     """
@@ -29,12 +38,7 @@ def filter_request():
     """
     if auth is None:
         pass
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/'
-    ]
-    if auth.require_auth(request.path, excluded_paths):
+    if auth.require_auth(request.path, EXCLUDED_PATHS):
         if auth.authorization_header(request) is None:
             abort(401)
         if auth.current_user(request) is None:
@@ -2,8 +2,84 @@
 """
 API Authentication System Management.
 """
+from functools import lru_cache
 from typing import List, TypeVar
 from flask import request
+import re
+
+
+# Trie keys marking the end of an exact path, and a wildcard
+_END = None
+_ANY = Ellipsis
+
+
+class PathMatcher:
+    """
+    Excluded paths compiled into one regular expression.
+
+    Paths ending with `*` match every path starting with what precedes
+    the `*`; other paths match exactly, with or without a trailing slash.
+    Patterns are merged into a trie before being compiled, so matching
+    is linear in the length of the path whatever the number of patterns.
+    """
+    def __init__(self, excluded_paths: List[str]):
+        """
+        Initializes PathMatcher instance attributes.
+
+        Arguments:
+            - `excluded_paths`: List of paths (url) that do not require
+            authentication.
+        """
+        self.excluded_paths = tuple(excluded_paths)
+        trie = {}
+        for x_path in self.excluded_paths:
+            wildcard = x_path.endswith('*')
+            if wildcard:
+                x_path = x_path[:-1]
+            elif not x_path.endswith('/'):
+                x_path += '/'
+            node = trie
+            for char in x_path:
+                node = node.setdefault(char, {})
+            node[_ANY if wildcard else _END] = True
+        self._match = re.compile(_trie_pattern(trie), re.DOTALL).fullmatch
+
+    def __len__(self) -> int:
+        """
+        Returns the number of excluded paths.
+        """
+        return len(self.excluded_paths)
+
+    def match(self, path: str) -> bool:
+        """
+        Returns `True` if `path` is excluded.
+        """
+        if not path.endswith('/'):
+            path += '/'
+        return self._match(path) is not None
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Returns the regular expression matching the paths of a trie `node`.
+    """
+    if _ANY in node:
+        return '.*'
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in node.items() if type(char) is str]
+    if _END in node:
+        branches.append('')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:{})'.format('|'.join(branches))
+
+
+@lru_cache(maxsize=32)
+def _path_matcher(excluded_paths: tuple) -> PathMatcher:
+    """
+    Returns the PathMatcher of `excluded_paths`, compiled once.
+    """
+    return PathMatcher(excluded_paths)
 
 
 class Auth:
@@ -17,22 +93,15 @@ class Auth:
         Arguments:
             - `path`: HTTP request path (url) to check.
             - `excluded_paths`: List of paths (url) that do not require
-            authentication.
+            authentication, or a PathMatcher compiled from it.
         """
         if path is None:
             return True
         if not excluded_paths:
             return True
-        for x_path in excluded_paths:
-            if x_path.endswith('*'):
-                end = x_path.split('/')[-1][:-1]
-                if end in path:
-                    return False
-        if not path.endswith('/'):
-            path += '/'
-        if path in excluded_paths:
-            return False
-        return True
+        if not isinstance(excluded_paths, PathMatcher):
+            excluded_paths = _path_matcher(tuple(excluded_paths))
+        return not excluded_paths.match(path)
 
     def authorization_header(self, request=None) -> str:
         """
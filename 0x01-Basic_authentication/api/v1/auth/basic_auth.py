@@ -4,14 +4,125 @@ Basic Authentication System Management.
 """
 from api.v1.auth.auth import Auth
 import base64
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
 from typing import TypeVar
-from models.user import User
+from models.user import User, USER_LISTENERS
+
+
+class CredentialCache:
+    """
+    Bounded LRU cache of verified Authorization headers.
+
+    Headers are keyed by their HMAC under a per-process random key, so
+    the cache never holds credentials. They map to the ID of their user
+    and to the email and password hash it was verified with: a hit reads
+    the user from storage and only counts if they are unchanged, as
+    another process may have changed them. Entries expire after `ttl`
+    seconds and are dropped when their user is saved, removed or gets a
+    new password in this process.
+    """
+    def __init__(self, size: int = 1024, ttl: float = 60):
+        """
+        Initializes CredentialCache instance attributes.
+
+        Arguments:
+            - `size`: maximum number of cached headers.
+            - `ttl`: lifetime in seconds of an entry.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every user change, so that a verification racing
+        # with one isn't cached
+        self.version = 0
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._digests_by_user_id = {}
+        self._lock = threading.Lock()
+        USER_LISTENERS.add(self)
+
+    def digest(self, authorization_header: str) -> bytes:
+        """
+        Returns the keyed digest of `authorization_header`.
+        """
+        return hmac.new(self._key, authorization_header.encode(),
+                        'sha256').digest()
+
+    def get(self, digest: bytes) -> tuple:
+        """
+        Returns the (user ID, email, password hash) cached for `digest`,
+        if not expired.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._drop(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest: bytes, user: TypeVar('User'), version: int):
+        """
+        Caches the ID, email and password hash of `user` as the owner of
+        `digest`, unless a user changed since `version`.
+        """
+        with self._lock:
+            if version != self.version:
+                return
+            if digest in self._entries:
+                self._drop(digest)
+            self._entries[digest] = ((user.id, user.email, user.password),
+                                     time.monotonic() + self.ttl)
+            self._digests_by_user_id.setdefault(user.id, set()).add(digest)
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+
+    def user_changed(self, user_id: str):
+        """
+        Drops the entries of `user_id`.
+        """
+        with self._lock:
+            self.version += 1
+            for digest in self._digests_by_user_id.pop(user_id, ()):
+                self._entries.pop(digest, None)
+
+    def _drop(self, digest: bytes):
+        """
+        Drops the entry of `digest`; called with the lock held.
+        """
+        (user_id, _, _), _ = self._entries.pop(digest)
+        digests = self._digests_by_user_id.get(user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._digests_by_user_id[user_id]
 
 
 class BasicAuth(Auth):
     """
     Basic Authentication System Manager.
     """
+    def __init__(self):
+        """
+        Initializes BasicAuth instance attributes.
+        """
+        try:
+            cache_size = int(os.getenv("BASIC_AUTH_CACHE_SIZE", "1024"))
+            cache_ttl = float(os.getenv("BASIC_AUTH_CACHE_TTL", "60"))
+        except ValueError:
+            cache_size, cache_ttl = 1024, 60
+        self.credential_cache = None
+        if cache_size > 0 and cache_ttl > 0:
+            self.credential_cache = CredentialCache(cache_size, cache_ttl)
+
     def extract_base64_authorization_header(
             self, authorization_header: str) -> str:
         """
@@ -99,7 +210,21 @@ class BasicAuth(Auth):
             - `request`: HTTP request.
         """
         auth_header = self.authorization_header(request)
+        cache = self.credential_cache
+        digest = None
+        if cache is not None and isinstance(auth_header, str):
+            digest = cache.digest(auth_header)
+            version = cache.version
+            entry = cache.get(digest)
+            if entry is not None:
+                user = User.get(entry[0])
+                if user is not None and \
+                        (user.email, user.password) == entry[1:]:
+                    return user
         auth_key = self.extract_base64_authorization_header(auth_header)
         decoded_auth_key = self.decode_base64_authorization_header(auth_key)
         user_email, user_pwd = self.extract_user_credentials(decoded_auth_key)
-        return self.user_object_from_credentials(user_email, user_pwd)
+        user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None and digest is not None:
+            cache.put(digest, user, version)
+        return user
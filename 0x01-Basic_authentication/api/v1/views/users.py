@@ -2,7 +2,7 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, request, Response
 from models.user import User
 
 
@@ -12,8 +12,25 @@ def view_all_users() -> str:
     Return:
       - list of all User objects JSON represented
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    return Response(_render_array(User.all()), mimetype='application/json')
+
+
+def _render_array(objs, chunk_size: int = 500):
+    """ Stream the cached JSON texts of `objs` as a JSON array,
+    `chunk_size` objects per chunk
+    """
+    chunk = []
+    separator = '['
+    for obj in objs:
+        chunk.append(obj.to_json_text())
+        if len(chunk) == chunk_size:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+        separator = ','
+    yield ('[' if separator == '[' else '') + ']\n'
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -2,39 +2,65 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from functools import lru_cache
+from typing import TypeVar, List, Iterable, Iterator
+from os import getenv
+from models.json_engine import JSONEngine
+from models.query import Query, stored
+from models.stats import class_stats, record_remove, record_save
+from models.storage import TIMESTAMP_FORMAT
 import json
 import uuid
 
 
-TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
-DATA = {}
+# Storage engine behind every model, selected with MODELS_ENGINE
+MODELS_ENGINE = getenv("MODELS_ENGINE", "json")
+if MODELS_ENGINE == "sqlite":
+    from models.sqlite_engine import SQLiteEngine
+    ENGINE = SQLiteEngine()
+else:
+    ENGINE = JSONEngine()
 
 
 class Base():
     """ Base class
     """
+    # Attributes are stored in slots rather than a per-instance __dict__,
+    # which divides the memory held by each object
+    __slots__ = ('id', 'created_at', 'updated_at', '_cache')
+    # Attributes with a secondary index: equality searches on them
+    # are dictionary lookups instead of scans
+    INDEXED = ()
+    # Attributes with a sorted index, built on first use: prefix, range
+    # and ordered searches on them read only the matching objects
+    ORDERED = ('created_at', 'updated_at')
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
-        s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
-
+        object.__setattr__(self, '_cache', None)
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = _parse_timestamp(kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = _parse_timestamp(kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
 
+    def __setattr__(self, name: str, value) -> None:
+        """ Set an attribute, keeping secondary indexes up to date and
+        dropping the cached JSON text
+        """
+        if name not in self.INDEXED and name not in self.ORDERED:
+            super().__setattr__(name, value)
+        else:
+            old_value = getattr(self, name, None)
+            super().__setattr__(name, value)
+            ENGINE.attribute_changed(self, name, old_value, value)
+        object.__setattr__(self, '_cache', None)
+
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
         """
@@ -48,7 +74,7 @@ class Base():
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        for key, value in self._attributes():
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -57,56 +83,81 @@ class Base():
                 result[key] = value
         return result
 
+    def to_json_text(self) -> str:
+        """ JSON text of `to_json()`, rendered once until an attribute is
+        assigned
+
+        Only this text is cached: journal and snapshot records are
+        serialized with `to_json(True)` and don't keep anything alive.
+        """
+        text = self._cache
+        if text is None:
+            text = json.dumps(self.to_json(), sort_keys=True,
+                              separators=(',', ':'))
+            object.__setattr__(self, '_cache', text)
+        return text
+
+    def _attributes(self) -> Iterable[tuple]:
+        """ Attribute names and values, in definition order
+        """
+        for key in _slot_names(self.__class__):
+            try:
+                yield key, getattr(self, key)
+            except AttributeError:
+                continue
+        yield from getattr(self, '__dict__', {}).items()
+
     @classmethod
-    def load_from_file(cls):
-        """ Load all objects from file
+    def load_from_file(cls, **kwargs):
+        """ Load all objects from storage
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        ENGINE.load(cls, **kwargs)
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def reload_if_changed(cls) -> bool:
+        """ Reload all objects if another process changed them
+        """
+        return ENGINE.reload_if_changed(cls)
+
+    @classmethod
+    def reindex(cls):
+        """ Rebuild the secondary indexes
+        """
+        ENGINE.reindex(cls)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
-
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+        ENGINE.save_all(cls)
 
     def save(self):
         """ Save current object
         """
-        s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        record_save(self.__class__.__name__, ENGINE.save(self))
 
     def remove(self):
         """ Remove object
         """
-        s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        if ENGINE.remove(self):
+            record_remove(self.__class__.__name__)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
-        s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return ENGINE.count(cls)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """ Object count, index cardinalities, and the creations,
+        updates and removals made by this process with their rates
+        """
+        result = {'count': ENGINE.count(cls),
+                  'cardinalities': ENGINE.cardinalities(cls)}
+        result.update(class_stats(cls.__name__).to_json())
+        return result
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -114,25 +165,101 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def page(cls, after: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return at most `limit` objects ordered by ID, starting after
+        ID `after`
+        """
+        return ENGINE.page(cls, after, limit)
+
+    @classmethod
+    def iterate(cls, after: str = None,
+                batch_size: int = 500) -> Iterator[TypeVar('Base')]:
+        """ Iterate over all objects ordered by ID, starting after ID
+        `after`, fetching `batch_size` objects at a time
+        """
+        while True:
+            objs = cls.page(after, batch_size)
+            yield from objs
+            if len(objs) < batch_size:
+                return
+            after = objs[-1].id
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return ENGINE.get(cls, id)
 
     @classmethod
-    def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
-        """ Search all objects with matching attributes
+    def search(cls, attributes: dict = None, prefix: dict = None,
+               ranges: dict = None, order_by: str = None,
+               descending: bool = False,
+               limit: int = None) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes, string prefixes
+        and (start, end) ranges, see `Query`
         """
-        s_class = cls.__name__
+        return ENGINE.search(cls, _query(attributes, prefix, ranges,
+                                         order_by, descending, limit))
+
+    @classmethod
+    def explain(cls, *args, **kwargs) -> dict:
+        """ Describe how `search` would run with the same arguments
+        """
+        return ENGINE.explain(cls, _query(*args, **kwargs))
+
+
+@lru_cache(maxsize=None)
+def _slot_names(cls) -> tuple:
+    """ Slots of `cls` and its parents, base classes first
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(slot for slot in slots
+                     if slot not in ('__dict__', '__weakref__', '_cache'))
+    return tuple(names)
 
-        def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
 
-        return list(filter(_search, DATA[s_class].values()))
+def flush():
+    """ Write out the changes buffered by the storage engine
+    """
+    ENGINE.flush()
+
+
+def _query(attributes: dict = None, prefix: dict = None,
+           ranges: dict = None, order_by: str = None,
+           descending: bool = False, limit: int = None) -> Query:
+    """ Query of `Base.search`, with timestamp strings parsed and
+    datetimes cut to the precision they are stored with, so that every
+    engine returns the same objects
+    """
+    for k, v in (attributes or {}).items():
+        if _criterion(k, v) is not v:
+            attributes = {k: _criterion(k, v) for k, v in attributes.items()}
+            break
+    if ranges:
+        ranges = {k: tuple(_criterion(k, v) for v in bounds)
+                  for k, bounds in ranges.items()}
+    return Query(attributes, prefix, ranges, order_by, descending, limit)
+
+
+def _criterion(attr: str, value):
+    """ Search criterion `value` of `attr`, see `_query`
+    """
+    if type(value) is str and attr in ('created_at', 'updated_at'):
+        value = _parse_timestamp(value)
+    return stored(value)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """ Parse a TIMESTAMP_FORMAT string, using the C ISO 8601 parser when
+    possible as it is much faster than strptime
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+""" File store module: atomic snapshot files and their readers
+"""
+from contextlib import contextmanager
+from os import getenv, path
+from typing import Iterator, Tuple
+import glob
+import json
+import os
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# MODELS_FSYNC policy:
+#   - "none": never fsync, rely on the OS to write files out
+#   - "snapshot": fsync snapshot files and their directory (default)
+#   - "all": also fsync every journal write
+FSYNC = getenv("MODELS_FSYNC", "snapshot")
+JOURNAL_FSYNC = FSYNC == "all"
+
+
+def write_atomic(file_path: str, objs_json: dict):
+    """ Write `objs_json` to `file_path` through a temporary file renamed
+    over it, so readers never see a truncated or partial file
+    """
+    tmp_path = "{}.{}.tmp".format(file_path, os.getpid())
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(objs_json, f)
+            if FSYNC != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if FSYNC != "none":
+        fsync_dir(path.dirname(path.abspath(file_path)))
+
+
+def remove_stale_tmp(file_path: str):
+    """ Remove the temporary files of `write_atomic` calls on `file_path`
+    that never completed, e.g. in a killed process; no write may be in
+    progress
+    """
+    for tmp_path in glob.glob("{}.*.tmp".format(glob.escape(file_path))):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def fsync_dir(dir_path: str):
+    """ Make a rename in `dir_path` durable
+    """
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_journal(journal):
+    """ Flush a journal to the OS, and to disk if the policy says so
+    """
+    journal.flush()
+    if JOURNAL_FSYNC:
+        os.fsync(journal.fileno())
+
+
+def read_snapshot(file_path: str) -> dict:
+    """ Parse a snapshot file, an empty file holding no objects
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return json.loads(data) if data else {}
+
+
+def signature(*file_paths: str) -> Tuple:
+    """ Identity of the current version of `file_paths`: inode, mtime and
+    size, which all change when a file is replaced or appended to
+    """
+    result = []
+    for file_path in file_paths:
+        try:
+            st = os.stat(file_path)
+            result.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except OSError:
+            result.append(None)
+    return tuple(result)
+
+
+@contextmanager
+def file_lock(file_path: str, enabled: bool = True):
+    """ Hold an exclusive advisory lock shared by all processes using
+    `file_path`
+    """
+    if not enabled or fcntl is None:
+        yield
+        return
+    with open("{}.lock".format(file_path), 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def iter_json_object(f, chunk_size: int = 1 << 16) -> Iterator[Tuple]:
+    """ Yield the (key, value) pairs of the JSON object in file `f`,
+    reading it `chunk_size` characters at a time
+
+    Values must be JSON objects, arrays or strings: a number at the end of
+    a chunk could otherwise be decoded partially.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size)
+    pos = 0
+
+    def _skip(expected: str) -> bool:
+        """ Skip whitespace, then `expected` if it is the next character
+        """
+        nonlocal buf, pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                if buf[pos] in expected:
+                    pos += 1
+                    return True
+                return False
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            buf, pos = chunk, 0
+
+    def _decode():
+        """ Decode the next JSON value, reading more data as needed
+        """
+        nonlocal buf, pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                pos = end
+                return value
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+
+    if not _skip('{'):
+        raise ValueError("Expecting a JSON object")
+    if _skip('}'):
+        return
+    while True:
+        _skip('')
+        key = _decode()
+        if not _skip(':'):
+            raise ValueError("Expecting ':' delimiter")
+        _skip('')
+        yield key, _decode()
+        if _skip('}'):
+            return
+        if not _skip(','):
+            raise ValueError("Expecting ',' delimiter")
@@ -0,0 +1,823 @@
+#!/usr/bin/env python3
+""" JSON storage engine module: in-memory objects persisted to
+`.db_<Class>.json` snapshots and `.db_<Class>.journal` journals
+"""
+from types import MappingProxyType
+from typing import Mapping, TypeVar, List
+from os import getenv, path
+from bisect import bisect_left, bisect_right, insort
+from models.file_store import file_lock, fsync_journal, iter_json_object, \
+    read_snapshot, remove_stale_tmp, signature, write_atomic
+from models.query import Query, sort_key
+from models.storage import StorageEngine
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# DATA[class name][id] holds a model instance, or the raw JSON dict of an
+# object loaded lazily and not instantiated yet. Writers hold _LOCK;
+# readers iterate a snapshot, never the live dict
+DATA = {}
+# VERSIONS[class name] is bumped whenever an object is added, replaced or
+# removed; SNAPSHOTS[class name] is the (version, copy, read-only view of
+# the copy) shared by readers until the next change
+VERSIONS = {}
+SNAPSHOTS = {}
+INDEXES = {}
+# ORDERS[class name] is the sorted list of the stored IDs, built on the
+# first `page` call and then kept up to date by `save` and `remove`
+ORDERS = {}
+# SORTED[class name][attribute] is the sorted list of (key, id) of the
+# objects with a value for an `ORDERED` attribute, built on the first
+# query that can use it, or False if its values can't be sorted
+SORTED = {}
+LOAD_STATS = {}
+LAZY_LOAD = getenv("MODELS_LAZY_LOAD", "0") == "1"
+
+# Saves and removes are appended to `.db_<Class>.journal`; a background
+# thread folds the journal into the `.db_<Class>.json` snapshot every
+# COMPACT_INTERVAL seconds, or sooner once COMPACT_THRESHOLD records
+# are pending. Compaction renames the journal to `.db_<Class>.journal.old`
+# and deletes it once the new snapshot is written.
+COMPACT_INTERVAL = float(getenv("MODELS_COMPACT_INTERVAL", "30"))
+COMPACT_THRESHOLD = int(getenv("MODELS_COMPACT_THRESHOLD", "10000"))
+# With MODELS_DURABILITY=group, journal records are buffered and flushed
+# together every GROUP_COMMIT_INTERVAL seconds or once
+# GROUP_COMMIT_THRESHOLD records are dirty, instead of on every save
+DURABILITY = getenv("MODELS_DURABILITY", "sync")
+GROUP_COMMIT_INTERVAL = float(getenv("MODELS_GROUP_COMMIT_INTERVAL", "0.05"))
+GROUP_COMMIT_THRESHOLD = int(getenv("MODELS_GROUP_COMMIT_THRESHOLD", "1000"))
+# With MODELS_SHARED=1, several processes share the same files: writes
+# are serialized with a file lock, and reads first replay the journal
+# records appended by other processes, or reload the class if another
+# process replaced its snapshot
+SHARED = getenv("MODELS_SHARED", "0") == "1"
+# _SIGNATURES[class name] is the (snapshot signature, journal inode,
+# journal offset) read so far, see `_signature`
+_SIGNATURES = {}
+_JOURNALS = {}
+_PENDING = {}
+_DIRTY = {}
+_LOCK = threading.RLock()
+# Held through a whole compaction and by loads, which must not read the
+# rotated journal while it is deleted
+_COMPACT_LOCK = threading.Lock()
+_COMPACT_EVENT = threading.Event()
+_FLUSH_EVENT = threading.Event()
+_THREADS = {}
+
+
+class JSONEngine(StorageEngine):
+    """ JSON files storage engine
+    """
+
+    def load(self, cls, lazy: bool = None):
+        """ Load all objects from the snapshot file, then replay the
+        rotated journal and the journal on top of it
+
+        With `lazy` (default: MODELS_LAZY_LOAD=1), the snapshot is parsed
+        incrementally and objects are only instantiated on first access
+        through `get` or `search`.
+        """
+        rotated_path = ".db_{}.journal.old".format(cls.__name__)
+        with _COMPACT_LOCK, file_lock(rotated_path, SHARED):
+            self._load(cls, lazy)
+
+    def _load(self, cls, lazy: bool = None):
+        """ `load`, with the compaction locks held
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        if lazy is None:
+            lazy = LAZY_LOAD
+        start = time.perf_counter()
+        # No compaction is running: a temporary snapshot is a leftover
+        remove_stale_tmp(file_path)
+        with _LOCK:
+            snapshot_signature = signature(file_path)[0]
+            # Filled aside, so readers see either all or none of it
+            objs = {}
+            if path.exists(file_path):
+                if lazy:
+                    with open(file_path, 'r') as f:
+                        objs.update(iter_json_object(f))
+                else:
+                    objs_json = read_snapshot(file_path)
+                    for obj_id, obj_json in objs_json.items():
+                        objs[obj_id] = cls(**obj_json)
+            _SIGNATURES[s_class] = (snapshot_signature,) + \
+                _replay_journal(cls, objs, lazy)
+            DATA[s_class] = objs
+            ORDERS.pop(s_class, None)
+            _changed(s_class)
+            self.reindex(cls)
+        LOAD_STATS[s_class] = {
+            'objects': len(DATA[s_class]),
+            'lazy': lazy,
+            'seconds': time.perf_counter() - start,
+            'file_bytes': path.getsize(file_path)
+            if path.exists(file_path) else 0,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if resource is not None else None,
+        }
+
+    def reload_if_changed(self, cls) -> bool:
+        """ Catch up with the changes made by another process since the
+        snapshot and the journal were last read
+
+        Only the journal records past the last offset read are replayed;
+        all objects are reloaded if the snapshot was replaced.
+        """
+        s_class = cls.__name__
+        if _signature(s_class) == _SIGNATURES.get(s_class):
+            return False
+        with _LOCK:
+            replayed = _replay_tail(cls)
+        if not replayed:
+            self.load(cls)
+        return True
+
+    def _reload_locked(self, cls):
+        """ `reload_if_changed`, with the compaction and write locks held
+        """
+        s_class = cls.__name__
+        if _signature(s_class) != _SIGNATURES.get(s_class) and \
+                not _replay_tail(cls):
+            self._load(cls)
+
+    def reindex(self, cls):
+        """ Rebuild the secondary indexes from the stored objects
+        """
+        s_class = cls.__name__
+        with _LOCK:
+            INDEXES[s_class] = {attr: {} for attr in cls.INDEXED}
+            SORTED.pop(s_class, None)
+            for obj_id, obj in DATA.get(s_class, {}).items():
+                _index_entry(cls, obj_id, obj)
+
+    def attribute_changed(self, obj: TypeVar('Base'), name: str,
+                          old_value, value):
+        """ Move a stored object to the index entries of its new value
+        """
+        obj_id = getattr(obj, 'id', None)
+        s_class = obj.__class__.__name__
+        if DATA.get(s_class, {}).get(obj_id) is not obj:
+            return
+        with _LOCK:
+            if name in obj.INDEXED:
+                _unindex(s_class, name, old_value, obj_id)
+                _index(s_class, name, value, obj_id)
+            if name in obj.ORDERED:
+                _unsort(s_class, name, old_value, obj_id)
+                _sort(s_class, name, value, obj_id)
+
+    def save_all(self, cls):
+        """ Save all objects to the snapshot file and empty the journal
+
+        Only the journal rotation and the copy of the objects hold the
+        lock: saves append to a new journal while the copy is serialized
+        and the snapshot replaced.
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        rotated_path = ".db_{}.journal.old".format(s_class)
+        with _COMPACT_LOCK, file_lock(rotated_path, SHARED):
+            with _LOCK, file_lock(file_path, SHARED):
+                if SHARED:
+                    self._reload_locked(cls)
+                _rotate_journal(s_class)
+                _PENDING.pop(s_class, None)
+                _SIGNATURES[s_class] = _signature(s_class)
+                objs = snapshot(s_class)
+            objs_json = {}
+            for obj_id, obj in objs.items():
+                if type(obj) is dict:
+                    objs_json[obj_id] = obj
+                else:
+                    objs_json[obj_id] = obj.to_json(True)
+            write_atomic(file_path, objs_json)
+            if path.exists(rotated_path):
+                os.remove(rotated_path)
+            with _LOCK:
+                # Saves since the rotation are still to be read
+                journal_signature = _SIGNATURES.get(s_class, (None,))[1:]
+                _SIGNATURES[s_class] = signature(file_path) + \
+                    journal_signature
+
+    def flush(self):
+        """ Write out every buffered journal record (group commit)
+        """
+        flush()
+
+    def save(self, obj: TypeVar('Base')) -> bool:
+        """ Store `obj` and append it to the journal
+        """
+        cls = obj.__class__
+        with _LOCK:
+            objs = DATA.setdefault(cls.__name__, {})
+            previous = objs.get(obj.id)
+            if previous is not obj:
+                if previous is not None:
+                    _unindex_entry(cls, obj.id, previous)
+                elif cls.__name__ in ORDERS:
+                    insort(ORDERS[cls.__name__], obj.id)
+                objs[obj.id] = obj
+                _changed(cls.__name__)
+                _index_entry(cls, obj.id, obj)
+            _append_journal(
+                cls, {'op': 'save', 'id': obj.id, 'obj': obj.to_json(True)})
+        return previous is None
+
+    def remove(self, obj: TypeVar('Base')) -> bool:
+        """ Drop `obj` and append its removal to the journal
+        """
+        cls = obj.__class__
+        with _LOCK:
+            objs = DATA.setdefault(cls.__name__, {})
+            stored = objs.get(obj.id)
+            if stored is not None:
+                _unindex_entry(cls, obj.id, stored)
+                del objs[obj.id]
+                _changed(cls.__name__)
+                order = ORDERS.get(cls.__name__)
+                if order is not None:
+                    i = bisect_left(order, obj.id)
+                    if i < len(order) and order[i] == obj.id:
+                        del order[i]
+                _append_journal(cls, {'op': 'remove', 'id': obj.id})
+        return stored is not None
+
+    def page(self, cls, after: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return at most `limit` objects ordered by ID, starting after
+        ID `after`
+        """
+        s_class = cls.__name__
+        if SHARED:
+            self.reload_if_changed(cls)
+        with _LOCK:
+            stored = DATA.get(s_class, {})
+            order = ORDERS.get(s_class)
+            if order is None:
+                order = ORDERS[s_class] = sorted(stored)
+            start = 0 if after is None else bisect_right(order, after)
+            objs = [(obj_id, stored[obj_id])
+                    for obj_id in order[start:start + limit]]
+        return [_instance(cls, obj_id, obj) for obj_id, obj in objs]
+
+    def count(self, cls) -> int:
+        """ Count all objects
+        """
+        if SHARED:
+            self.reload_if_changed(cls)
+        return len(DATA.get(cls.__name__, {}))
+
+    def cardinalities(self, cls) -> dict:
+        """ Number of index buckets of each `INDEXED` attribute
+        """
+        indexes = INDEXES.get(cls.__name__, {})
+        return {attr: len(indexes.get(attr, {})) for attr in cls.INDEXED}
+
+    def get(self, cls, obj_id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        if SHARED:
+            self.reload_if_changed(cls)
+        obj = DATA.get(cls.__name__, {}).get(obj_id)
+        if obj is None:
+            return None
+        return _instance(cls, obj_id, obj)
+
+    def search(self, cls, query: Query) -> List[TypeVar('Base')]:
+        """ Search all objects matching `query` through the access path
+        chosen by `explain`
+        """
+        if SHARED:
+            self.reload_if_changed(cls)
+        with _LOCK:
+            plan = self._plan(cls, query)
+            # Copy the IDs rather than the objects, as writers change
+            # index buckets and move sorted index entries in place
+            if plan['access'] == 'index':
+                plan['ids'] = tuple(plan['ids'])
+            elif plan['access'] == 'range':
+                limit = None
+                if plan['ordered'] and _covers(query, plan['attribute']):
+                    limit = query.limit
+                descending = plan['ordered'] and query.descending
+                plan['ids'] = _range_ids(*plan['ids'], descending, limit)
+        if plan['access'] == 'scan':
+            objs = (_instance(cls, obj_id, obj)
+                    for obj_id, obj in snapshot(cls.__name__).items())
+        else:
+            stored = DATA.get(cls.__name__, {})
+            objs = (_instance(cls, obj_id, stored[obj_id])
+                    for obj_id in plan['ids'] if obj_id in stored)
+        return query.finish(objs, plan['ordered'])
+
+    def snapshot(self, cls) -> Mapping:
+        """ Read-only copy of the objects of `cls` by ID, as of now
+        """
+        return snapshot(cls.__name__)
+
+    def explain(self, cls, query: Query) -> dict:
+        """ Describe how `search` would run `query`
+        """
+        plan = self._plan(cls, query)
+        del plan['ids']
+        return plan
+
+    def _plan(self, cls, query: Query) -> dict:
+        """ Pick the access path reading the fewest objects: an index
+        bucket for an equality, a slice of a sorted index for a prefix or
+        a range, a sorted index walk for an ordered and limited query, or
+        a full scan; `ids` is the bucket or the (index, lo, hi) slice,
+        read with _LOCK held
+        """
+        s_class = cls.__name__
+        stored = DATA.get(s_class, {})
+        plan = {'access': 'scan', 'attribute': None,
+                'estimated_rows': len(stored), 'ids': None}
+        indexes = INDEXES.get(s_class, {})
+        for k, v in query.attributes.items():
+            if k not in indexes:
+                continue
+            try:
+                bucket = indexes[k].get(v, {})
+            except TypeError:
+                continue
+            if len(bucket) < plan['estimated_rows']:
+                plan = {'access': 'index', 'attribute': k,
+                        'estimated_rows': len(bucket), 'ids': bucket}
+        bounds = query.bounds() if query.prefix or query.ranges else {}
+        for attr, (low, high) in bounds.items():
+            index = _sorted_index(cls, attr)
+            if index is None:
+                continue
+            try:
+                lo = 0 if low is None else \
+                    bisect_left(index, (sort_key(low),))
+                hi = len(index) if high is None else \
+                    bisect_left(index, (sort_key(high),))
+            except TypeError:
+                continue
+            if hi - lo < plan['estimated_rows'] or \
+                    (hi - lo == plan['estimated_rows'] and
+                     attr == query.order_by):
+                plan = {'access': 'range', 'attribute': attr,
+                        'estimated_rows': max(hi - lo, 0),
+                        'ids': (index, lo, hi)}
+        if plan['access'] == 'scan' and query.order_by is not None and \
+                query.limit is not None:
+            index = _sorted_index(cls, query.order_by)
+            # Objects without a value are missing from the index
+            if index is not None and len(index) == len(stored):
+                plan = {'access': 'range', 'attribute': query.order_by,
+                        'estimated_rows': len(stored),
+                        'ids': (index, 0, len(index))}
+        plan['ordered'] = plan['access'] == 'range' and \
+            plan['attribute'] == query.order_by
+        plan['sort'] = query.order_by is not None and not plan['ordered']
+        plan['limit'] = query.limit
+        return plan
+
+
+def compact():
+    """ Fold every pending journal into its snapshot file
+    """
+    with _LOCK:
+        pending = [cls for cls, _ in _PENDING.values()]
+    for cls in pending:
+        cls.save_to_file()
+
+
+def flush():
+    """ Write out every buffered journal record (group commit)
+    """
+    with _LOCK:
+        for s_class in list(_DIRTY):
+            fsync_journal(_JOURNALS[s_class])
+        _DIRTY.clear()
+
+
+def _signature(s_class: str) -> tuple:
+    """ Current signature of the snapshot of `s_class`, and inode and
+    size of its journal (None and 0 without journal)
+    """
+    snapshot_signature, journal_signature = signature(
+        ".db_{}.json".format(s_class), ".db_{}.journal".format(s_class))
+    if journal_signature is None:
+        return snapshot_signature, None, 0
+    return snapshot_signature, journal_signature[0], journal_signature[2]
+
+
+def snapshot(s_class: str) -> Mapping:
+    """ Read-only copy of DATA[s_class], copied at most once per version
+    and shared by all readers
+    """
+    version = VERSIONS.get(s_class, 0)
+    cached = SNAPSHOTS.get(s_class)
+    if cached is not None and cached[0] == version:
+        return cached[2]
+    with _LOCK:
+        version = VERSIONS.get(s_class, 0)
+        cached = SNAPSHOTS.get(s_class)
+        if cached is None or cached[0] != version:
+            objs = dict(DATA.get(s_class, {}))
+            cached = (version, objs, MappingProxyType(objs))
+            SNAPSHOTS[s_class] = cached
+    return cached[2]
+
+
+def _changed(s_class: str):
+    """ Retire the current snapshot of `s_class`; called with _LOCK held
+    """
+    VERSIONS[s_class] = VERSIONS.get(s_class, 0) + 1
+    SNAPSHOTS.pop(s_class, None)
+
+
+def _rotate_journal(s_class: str):
+    """ Move the journal of `s_class` to its rotated journal, appending
+    to the one left by an interrupted compaction if any; called with the
+    write locks held
+    """
+    journal_path = ".db_{}.journal".format(s_class)
+    rotated_path = ".db_{}.journal.old".format(s_class)
+    journal = _JOURNALS.pop(s_class, None)
+    if journal is not None:
+        fsync_journal(journal)
+        journal.close()
+        _DIRTY.pop(s_class, None)
+    if not path.exists(journal_path):
+        return
+    if not path.exists(rotated_path):
+        os.replace(journal_path, rotated_path)
+        return
+    with open(journal_path, 'rb') as src, open(rotated_path, 'ab+') as dst:
+        if dst.tell() > 0:
+            dst.seek(dst.tell() - 1)
+            if dst.read(1) != b"\n":
+                dst.write(b"\n")
+        shutil.copyfileobj(src, dst)
+    os.remove(journal_path)
+
+
+def _replay_journal(cls, objs: dict, lazy: bool = False) -> tuple:
+    """ Apply the records of the rotated journal, then of the journal of
+    `cls`, to its loaded objects `objs`, and return the inode of the
+    journal and the offset read
+    """
+    s_class = cls.__name__
+    inode, offset = None, 0
+    for journal_path in (".db_{}.journal.old".format(s_class),
+                         ".db_{}.journal".format(s_class)):
+        journal = _read_journal(journal_path)
+        if journal is None:
+            continue
+        records, offset, inode = journal
+        for record in records:
+            if record.get('op') == 'save':
+                obj = record['obj']
+                objs[record['id']] = obj if lazy else cls(**obj)
+            elif record.get('op') == 'remove':
+                objs.pop(record['id'], None)
+    return inode, offset
+
+
+def _read_journal(journal_path: str, offset: int = 0) -> tuple:
+    """ Records of a journal from byte `offset`, the offset past the last
+    complete record and the journal inode, or None if it doesn't exist
+    """
+    try:
+        f = open(journal_path, 'rb')
+    except FileNotFoundError:
+        return None
+    records = []
+    with f:
+        inode = os.fstat(f.fileno()).st_ino
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Still being written by another process
+                break
+            offset += len(line)
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Torn write left by a crash
+                continue
+    return records, offset, inode
+
+
+def _replay_tail(cls) -> bool:
+    """ Apply the journal records of `cls` appended since the journal was
+    last read; False if all objects must be reloaded instead, as the
+    snapshot was replaced or the journal rotated out of reach. Called
+    with _LOCK held
+    """
+    s_class = cls.__name__
+    journal_path = ".db_{}.journal".format(s_class)
+    rotated_path = ".db_{}.journal.old".format(s_class)
+    known = _SIGNATURES.get(s_class)
+    current = _signature(s_class)
+    if known is None or current[0] != known[0]:
+        return False
+    _, inode, offset = known
+    records = []
+    if inode is not None and current[1] != inode:
+        # Rotated by a compaction: finish reading the rotated journal
+        journal = _read_journal(rotated_path, offset)
+        if journal is None or journal[2] != inode:
+            return False
+        records = journal[0]
+        inode, offset = None, 0
+    elif inode is None and path.exists(rotated_path):
+        # The rotated journal may hold records never read
+        return False
+    if current[1] is not None:
+        journal = _read_journal(journal_path, offset)
+        if journal is None or (inode is not None and journal[2] != inode):
+            return False
+        records.extend(journal[0])
+        offset, inode = journal[1], journal[2]
+    _apply_records(cls, records)
+    _SIGNATURES[s_class] = (known[0], inode, offset)
+    return True
+
+
+def _apply_records(cls, records: list):
+    """ Apply journal records to the stored objects of `cls` and their
+    indexes; called with _LOCK held
+    """
+    s_class = cls.__name__
+    objs = DATA.setdefault(s_class, {})
+    for record in records:
+        obj_id = record.get('id')
+        previous = objs.get(obj_id)
+        if record.get('op') == 'save':
+            obj = cls(**record['obj'])
+            if previous is not None:
+                _unindex_entry(cls, obj_id, previous)
+            elif s_class in ORDERS:
+                insort(ORDERS[s_class], obj_id)
+            objs[obj_id] = obj
+            _index_entry(cls, obj_id, obj)
+        elif record.get('op') == 'remove' and previous is not None:
+            _unindex_entry(cls, obj_id, previous)
+            del objs[obj_id]
+            order = ORDERS.get(s_class)
+            if order is not None:
+                i = bisect_left(order, obj_id)
+                if i < len(order) and order[i] == obj_id:
+                    del order[i]
+    if records:
+        _changed(s_class)
+
+
+def _append_journal(cls, record: dict):
+    """ Append one save/remove record to the journal of `cls`
+    """
+    s_class = cls.__name__
+    line = json.dumps(record) + "\n"
+    with _LOCK, file_lock(".db_{}.json".format(s_class), SHARED):
+        fresh = SHARED and _signature(s_class) == _SIGNATURES.get(s_class)
+        journal = _JOURNALS.get(s_class)
+        if journal is not None and SHARED and _rotated(journal, s_class):
+            # Another process compacted: append to the new journal
+            journal.close()
+            journal = None
+        if journal is None:
+            journal = open(".db_{}.journal".format(s_class), 'a+',
+                           buffering=1 << 20)
+            if journal.tell() > 0:
+                journal.seek(journal.tell() - 1)
+                if journal.read(1) != "\n":
+                    journal.write("\n")
+            _JOURNALS[s_class] = journal
+        journal.write(line)
+        if DURABILITY == "group" and not SHARED:
+            _DIRTY[s_class] = _DIRTY.get(s_class, 0) + 1
+            dirty = sum(_DIRTY.values())
+        else:
+            fsync_journal(journal)
+            dirty = 0
+        if fresh:
+            _SIGNATURES[s_class] = _signature(s_class)
+        pending = _PENDING.get(s_class, (cls, 0))[1] + 1
+        _PENDING[s_class] = (cls, pending)
+    _start_thread("models-compactor", _compact_loop)
+    if pending >= COMPACT_THRESHOLD:
+        _COMPACT_EVENT.set()
+    if dirty:
+        _start_thread("models-flusher", _flush_loop)
+        if dirty >= GROUP_COMMIT_THRESHOLD:
+            _FLUSH_EVENT.set()
+
+
+def _rotated(journal, s_class: str) -> bool:
+    """ True if the open `journal` is no longer the journal of `s_class`
+    """
+    try:
+        st = os.stat(".db_{}.journal".format(s_class))
+    except OSError:
+        return True
+    return os.fstat(journal.fileno()).st_ino != st.st_ino
+
+
+def _instance(cls, obj_id: str, obj) -> TypeVar('Base'):
+    """ Return the stored object, instantiating it if it was loaded
+    lazily
+    """
+    if type(obj) is not dict:
+        return obj
+    with _LOCK:
+        objs = DATA[cls.__name__]
+        obj = objs.get(obj_id)
+        if type(obj) is dict:
+            obj = cls(**obj)
+            objs[obj_id] = obj
+            # Same object, so the snapshot doesn't change version
+            cached = SNAPSHOTS.get(cls.__name__)
+            if cached is not None and obj_id in cached[1]:
+                cached[1][obj_id] = obj
+    return obj
+
+
+def _at_exit():
+    """ Let a running compaction finish before the interpreter kills the
+    compactor thread, keep others from starting, and flush the journals
+    """
+    _COMPACT_LOCK.acquire(timeout=60)
+    flush()
+
+
+def _compact_loop():
+    """ Background compaction thread
+    """
+    while True:
+        _COMPACT_EVENT.wait(COMPACT_INTERVAL)
+        _COMPACT_EVENT.clear()
+        try:
+            compact()
+        except Exception:
+            pass
+
+
+def _flush_loop():
+    """ Background group commit thread
+    """
+    while True:
+        _FLUSH_EVENT.wait(GROUP_COMMIT_INTERVAL)
+        _FLUSH_EVENT.clear()
+        try:
+            flush()
+        except Exception:
+            pass
+
+
+def _start_thread(name: str, target):
+    """ Start the background thread `name` once
+    """
+    if name in _THREADS:
+        return
+    with _LOCK:
+        if name not in _THREADS:
+            if not _THREADS:
+                atexit.register(_at_exit)
+            _THREADS[name] = threading.Thread(
+                target=target, name=name, daemon=True)
+            _THREADS[name].start()
+
+
+def _attr(obj, attr: str):
+    """ Value of `attr` on a model instance or a raw JSON dict
+    """
+    if type(obj) is dict:
+        return obj.get(attr)
+    return getattr(obj, attr, None)
+
+
+def _index_entry(cls, obj_id: str, obj):
+    """ Add a stored object to every secondary index of its class
+    """
+    for attr in cls.INDEXED:
+        _index(cls.__name__, attr, _attr(obj, attr), obj_id)
+    for attr in cls.ORDERED:
+        _sort(cls.__name__, attr, _attr(obj, attr), obj_id)
+
+
+def _unindex_entry(cls, obj_id: str, obj):
+    """ Remove a stored object from every secondary index of its class
+    """
+    for attr in cls.INDEXED:
+        _unindex(cls.__name__, attr, _attr(obj, attr), obj_id)
+    for attr in cls.ORDERED:
+        _unsort(cls.__name__, attr, _attr(obj, attr), obj_id)
+
+
+def _index(s_class: str, attr: str, value, obj_id: str):
+    """ Add `obj_id` to the `attr` index bucket of `value`
+    """
+    try:
+        bucket = INDEXES.setdefault(s_class, {}) \
+            .setdefault(attr, {}).setdefault(value, {})
+    except TypeError:
+        return
+    bucket[obj_id] = True
+
+
+def _unindex(s_class: str, attr: str, value, obj_id: str):
+    """ Remove `obj_id` from the `attr` index bucket of `value`
+    """
+    try:
+        index = INDEXES.get(s_class, {}).get(attr, {})
+        bucket = index.get(value)
+    except TypeError:
+        return
+    if bucket is not None and obj_id in bucket:
+        del bucket[obj_id]
+        if not bucket:
+            del index[value]
+
+
+def _sorted_index(cls, attr: str) -> list:
+    """ Sorted index of `attr`, or None if `attr` isn't `ORDERED` or its
+    values can't be sorted
+    """
+    if attr not in cls.ORDERED:
+        return None
+    s_class = cls.__name__
+    with _LOCK:
+        indexes = SORTED.setdefault(s_class, {})
+        index = indexes.get(attr)
+        if index is None:
+            index = []
+            for obj_id, obj in DATA.get(s_class, {}).items():
+                value = _attr(obj, attr)
+                if value is not None:
+                    index.append((sort_key(value), obj_id))
+            try:
+                index.sort()
+            except TypeError:
+                index = False
+            indexes[attr] = index
+    return index if index is not False else None
+
+
+def _covers(query: Query, attr: str) -> bool:
+    """ True if every object in the sorted index slice of `attr` chosen
+    for `query` matches it, so the slice can be cut at the limit
+    """
+    return not query.attributes and set(query.prefix) <= {attr} and \
+        set(query.ranges) <= {attr}
+
+
+def _range_ids(index: list, lo: int, hi: int, descending: bool = False,
+               limit: int = None) -> list:
+    """ IDs of the entries `lo` to `hi` of a sorted index, reversed if
+    `descending`, only the first `limit` of them if given; called with
+    _LOCK held
+    """
+    if limit is not None and descending:
+        lo = max(lo, hi - limit)
+    elif limit is not None:
+        hi = min(hi, lo + limit)
+    entries = index[lo:hi]
+    if descending:
+        entries.reverse()
+    return [obj_id for _, obj_id in entries]
+
+
+def _sort(s_class: str, attr: str, value, obj_id: str):
+    """ Add `obj_id` to the sorted index of `attr`, if it was built
+    """
+    index = SORTED.get(s_class, {}).get(attr)
+    if type(index) is not list or value is None:
+        return
+    try:
+        insort(index, (sort_key(value), obj_id))
+    except TypeError:
+        SORTED[s_class][attr] = False
+
+
+def _unsort(s_class: str, attr: str, value, obj_id: str):
+    """ Remove `obj_id` from the sorted index of `attr`, if it was built
+    """
+    index = SORTED.get(s_class, {}).get(attr)
+    if type(index) is not list or value is None:
+        return
+    entry = (sort_key(value), obj_id)
+    try:
+        i = bisect_left(index, entry)
+    except TypeError:
+        return
+    if i < len(index) and index[i] == entry:
+        del index[i]
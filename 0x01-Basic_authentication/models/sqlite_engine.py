@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+""" SQLite storage engine module
+"""
+from datetime import datetime
+from typing import TypeVar, List
+from os import getenv
+from models.query import Query
+from models.storage import StorageEngine, TIMESTAMP_FORMAT
+import json
+import sqlite3
+import threading
+
+
+class SQLiteEngine(StorageEngine):
+    """ SQLite storage engine
+
+    Each model class gets a table with its JSON document plus one indexed
+    column per `INDEXED` attribute and per timestamp, so equality
+    searches on them go through the SQLite query planner. The database
+    runs in WAL mode: several worker processes can read and write it
+    concurrently.
+    """
+
+    def __init__(self, db_path: str = None):
+        """ Initialize the engine on `db_path` (default:
+        MODELS_SQLITE_PATH or `.db.sqlite3`)
+        """
+        self.db_path = db_path or getenv("MODELS_SQLITE_PATH",
+                                         ".db.sqlite3")
+        self._local = threading.local()
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30,
+                                   isolation_level=None,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _table(self, cls) -> dict:
+        """ Columns and SQL statements of the table of `cls`, creating
+        the table on first use
+
+        Statements are built once per class so that sqlite3 reuses its
+        prepared statement cache.
+        """
+        table = self._tables.get(cls)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(cls)
+            if table is not None:
+                return table
+            name = cls.__name__
+            columns = ('id', 'created_at', 'updated_at') + tuple(
+                attr for attr in cls.INDEXED
+                if attr not in ('id', 'created_at', 'updated_at'))
+            conn = self._connection()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS "{}" ({}, data TEXT NOT NULL)'
+                .format(name, ", ".join(
+                    '"{}"{}'.format(c, " TEXT PRIMARY KEY" if c == 'id'
+                                    else "") for c in columns)))
+            for column in columns[1:]:
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ("{1}")'
+                    .format(name, column))
+            # Object counts are kept by triggers, so `count` doesn't
+            # scan the table
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("CREATE TABLE IF NOT EXISTS _counts ("
+                             "name TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+                conn.execute('INSERT OR IGNORE INTO _counts '
+                             'SELECT ?, COUNT(*) FROM "{}"'.format(name),
+                             (name,))
+                for event, delta in (('INSERT', '+ 1'), ('DELETE', '- 1')):
+                    conn.execute(
+                        'CREATE TRIGGER IF NOT EXISTS "{0}_count_{1}" '
+                        'AFTER {1} ON "{0}" BEGIN UPDATE _counts '
+                        "SET count = count {2} WHERE name = '{0}'; END"
+                        .format(name, event, delta))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            quoted = ", ".join('"{}"'.format(c) for c in columns)
+            table = {
+                'columns': columns,
+                'save': 'INSERT INTO "{}" ({}, data) VALUES ({}) '
+                        'ON CONFLICT(id) DO UPDATE SET {}'.format(
+                            name, quoted, ", ".join("?" * (len(columns) + 1)),
+                            ", ".join('"{0}" = excluded."{0}"'.format(c)
+                                      for c in columns[1:] + ('data',))),
+                'remove': 'DELETE FROM "{}" WHERE id = ?'.format(name),
+                'get': 'SELECT data FROM "{}" WHERE id = ?'.format(name),
+                'count': "SELECT count FROM _counts WHERE name = ?",
+                'select': 'SELECT data FROM "{}"'.format(name),
+                'page': 'SELECT data FROM "{}" WHERE id > ? '
+                        'ORDER BY id LIMIT ?'.format(name),
+            }
+            self._tables[cls] = table
+            return table
+
+    def load(self, cls, **kwargs):
+        """ Create the table of `cls` if needed
+        """
+        self._table(cls)
+
+    def save(self, obj: TypeVar('Base')) -> bool:
+        """ Insert or update `obj`, return True if it was inserted
+        """
+        table = self._table(obj.__class__)
+        obj_json = obj.to_json(True)
+        values = [obj_json.get(c) for c in table['columns']]
+        values.append(json.dumps(obj_json))
+        conn = self._connection()
+        changes = conn.total_changes
+        conn.execute(table['save'], values)
+        # An insert also changes the _counts row through its trigger
+        return conn.total_changes - changes > 1
+
+    def remove(self, obj: TypeVar('Base')) -> bool:
+        """ Delete `obj`, return True if it was stored
+        """
+        table = self._table(obj.__class__)
+        cursor = self._connection().execute(table['remove'], (obj.id,))
+        return cursor.rowcount > 0
+
+    def count(self, cls) -> int:
+        """ Count all objects, from the counter kept by triggers
+        """
+        table = self._table(cls)
+        row = self._connection().execute(
+            table['count'], (cls.__name__,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def cardinalities(self, cls) -> dict:
+        """ Distinct values of each `INDEXED` attribute, estimated from
+        the statistics of the last ANALYZE if any
+        """
+        table = self._table(cls)
+        result = {attr: None for attr in cls.INDEXED}
+        try:
+            rows = self._connection().execute(
+                "SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ?",
+                (cls.__name__,)).fetchall()
+        except sqlite3.OperationalError:
+            return result
+        for idx, stat in rows:
+            attr = (idx or "")[len(cls.__name__) + 1:]
+            numbers = stat.split()
+            if attr in result and len(numbers) > 1:
+                result[attr] = int(numbers[0]) // max(int(numbers[1]), 1)
+        return result
+
+    def get(self, cls, obj_id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        table = self._table(cls)
+        row = self._connection().execute(table['get'], (obj_id,)).fetchone()
+        if row is None:
+            return None
+        return cls(**json.loads(row[0]))
+
+    def page(self, cls, after: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return at most `limit` objects ordered by ID, starting after
+        ID `after`, through the primary key index
+        """
+        table = self._table(cls)
+        rows = self._connection().execute(table['page'], (after or "", limit))
+        return [cls(**json.loads(row[0])) for row in rows]
+
+    def search(self, cls, query: Query) -> List[TypeVar('Base')]:
+        """ Search all objects matching `query`: criteria on attributes
+        stored in a column are filtered in SQL, the others in Python
+        """
+        sql, params, ordered = self._plan(cls, query)
+        rows = self._connection().execute(sql, params)
+        objs = (cls(**json.loads(row[0])) for row in rows)
+        return query.finish(objs, ordered)
+
+    def explain(self, cls, query: Query) -> dict:
+        """ Describe how `search` would run `query`, with the plan of
+        the SQLite query planner
+        """
+        sql, params, ordered = self._plan(cls, query)
+        details = [row[-1] for row in self._connection().execute(
+            "EXPLAIN QUERY PLAN " + sql, params)]
+        return {'access': 'sql', 'sql': sql, 'plan': details,
+                'sort': query.order_by is not None and not ordered,
+                'limit': query.limit}
+
+    def _plan(self, cls, query: Query) -> tuple:
+        """ SQL statement, parameters, and whether it returns objects in
+        the order of `query`
+        """
+        columns = self._table(cls)['columns']
+        where = []
+        params = []
+        for k, v in query.attributes.items():
+            if isinstance(v, datetime):
+                v = v.strftime(TIMESTAMP_FORMAT)
+            if k not in columns:
+                continue
+            if v is None:
+                where.append('"{}" IS NULL'.format(k))
+            elif isinstance(v, (str, int, float)):
+                where.append('"{}" = ?'.format(k))
+                params.append(v)
+        for k, (low, high) in query.bounds().items():
+            if k not in columns:
+                continue
+            for value, op in ((low, '>='), (high, '<')):
+                if isinstance(value, datetime):
+                    value = value.strftime(TIMESTAMP_FORMAT)
+                if isinstance(value, (str, int, float)):
+                    where.append('"{}" {} ?'.format(k, op))
+                    params.append(value)
+        sql = self._table(cls)['select']
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        ordered = query.order_by is None or query.order_by in columns
+        if query.order_by in columns and query.descending:
+            # NULL sorts first, so it comes last in descending order
+            sql += ' ORDER BY "{}" DESC, rowid'.format(query.order_by)
+        elif query.order_by in columns:
+            sql += ' ORDER BY "{0}" IS NULL, "{0}", rowid'.format(
+                query.order_by)
+        else:
+            sql += " ORDER BY rowid"
+        return sql, params, ordered
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+""" Storage engine module
+"""
+from typing import TypeVar, List
+from models.query import Query
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class StorageEngine():
+    """ Interface of the storage engines behind `Base`: every model
+    class is stored in its own table, keyed by object ID
+    """
+
+    def load(self, cls, **kwargs):
+        """ Load or open the storage of `cls`
+        """
+        pass
+
+    def reload_if_changed(self, cls) -> bool:
+        """ Reload `cls` if another process changed its storage
+        """
+        return False
+
+    def save_all(self, cls):
+        """ Persist every object of `cls`
+        """
+        pass
+
+    def flush(self):
+        """ Write out the changes buffered by the engine, if any
+        """
+        pass
+
+    def reindex(self, cls):
+        """ Rebuild the secondary indexes of `cls`
+        """
+        pass
+
+    def attribute_changed(self, obj: TypeVar('Base'), name: str,
+                          old_value, value):
+        """ Called when an indexed attribute of `obj` is assigned
+        """
+        pass
+
+    def save(self, obj: TypeVar('Base')) -> bool:
+        """ Insert or update `obj`, return True if it was inserted
+        """
+        raise NotImplementedError
+
+    def remove(self, obj: TypeVar('Base')) -> bool:
+        """ Delete `obj`, return True if it was stored
+        """
+        raise NotImplementedError
+
+    def get(self, cls, obj_id: str) -> TypeVar('Base'):
+        """ Return the object of `cls` with ID `obj_id`, or None
+        """
+        raise NotImplementedError
+
+    def search(self, cls, query: Query) -> List[TypeVar('Base')]:
+        """ Return the objects of `cls` matching `query`, in the order it
+        sets if any
+        """
+        raise NotImplementedError
+
+    def explain(self, cls, query: Query) -> dict:
+        """ Describe the access path `search` would use for `query`
+        """
+        raise NotImplementedError
+
+    def page(self, cls, after: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return at most `limit` objects of `cls` ordered by ID,
+        starting after ID `after`
+        """
+        raise NotImplementedError
+
+    def count(self, cls) -> int:
+        """ Return the number of objects of `cls`, without scanning them
+        """
+        raise NotImplementedError
+
+    def cardinalities(self, cls) -> dict:
+        """ Return the number of distinct values of each `INDEXED`
+        attribute of `cls`, or None where it isn't known
+        """
+        return {attr: None for attr in cls.INDEXED}
@@ -2,12 +2,21 @@
 """ User module
 """
 import hashlib
+import weakref
 from models.base import Base
 
 
+# Objects notified through `user_changed(user_id)` when a user is saved,
+# removed or gets a new password, e.g. caches of authenticated users
+USER_LISTENERS = weakref.WeakSet()
+
+
 class User(Base):
     """ User class
     """
+    __slots__ = ('email', '_password', 'first_name', 'last_name')
+    INDEXED = ('email',)
+    ORDERED = Base.ORDERED + ('email',)
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -32,6 +41,7 @@ class User(Base):
             self._password = None
         else:
             self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+        self._notify()
 
     def is_valid_password(self, pwd: str) -> bool:
         """ Validate a password
@@ -43,6 +53,24 @@ class User(Base):
         pwd_e = pwd.encode()
         return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
 
+    def save(self):
+        """ Save current user
+        """
+        super().save()
+        self._notify()
+
+    def remove(self):
+        """ Remove user
+        """
+        super().remove()
+        self._notify()
+
+    def _notify(self):
+        """ Tell USER_LISTENERS that this user changed
+        """
+        for listener in list(USER_LISTENERS):
+            listener.user_changed(self.id)
+
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
         """
@@ -3,8 +3,10 @@
 Route module for the API
 """
 from os import getenv
+from api.v1.auth.auth import PathMatcher
 from api.v1.views import app_views
-from flask import Flask, jsonify, abort, request
+from flask import Flask, jsonify, abort, request, Request
+from functools import cached_property
 from flask_cors import (CORS, cross_origin)
 import os
 
@@ -31,26 +33,47 @@ elif AUTH_TYPE == 'session_db_auth':
     auth = SessionDBAuth()
 
 
+# Paths served without authentication, compiled once
+EXCLUDED_PATHS = PathMatcher([
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/'
+])
+
+
+class AuthRequest(Request):
+    """
+    Request whose `current_user` is resolved on first access only, then
+    reused for the rest of the request.
+    """
+    @cached_property
+    def current_user(self):
+        """
+        Returns the User instance authenticated by the request.
+        """
+        if auth is None:
+            return None
+        return auth.current_user(self)
+
+
+app.request_class = AuthRequest
+
+
 @app.before_request
 def filter_request():
     """
     Filters each request before response.
     """
     if auth is None:
-        pass
-    setattr(request, "current_user", auth.current_user(request))
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/',
-        '/api/v1/auth_session/login/'
-    ]
-    if auth.require_auth(request.path, excluded_paths):
-        if auth.authorization_header(request) is None:
-            if auth.session_cookie(request) is None:
-                abort(401)
-        if auth.current_user(request) is None:
-            abort(403)
+        return
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
+        return
+    if auth.authorization_header(request) is None:
+        if auth.session_cookie(request) is None:
+            abort(401)
+    if request.current_user is None:
+        abort(403)
 
 
 @app.errorhandler(404)
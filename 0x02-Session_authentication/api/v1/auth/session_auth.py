@@ -66,5 +66,6 @@ class SessionAuth(Auth):
             return False
         if not self.user_id_for_session_id(session_id):
             return False
-        del self.user_id_by_session_id[session_id]
+        # The sweeper may have evicted it since
+        self.user_id_by_session_id.pop(session_id, None)
         return True
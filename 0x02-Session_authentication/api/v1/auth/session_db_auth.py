@@ -4,7 +4,6 @@ Database Session Authentication Management.
 """
 from api.v1.auth.session_exp_auth import SessionExpAuth
 from models.user_session import UserSession
-from datetime import datetime, timedelta
 
 
 class SessionDBAuth(SessionExpAuth):
@@ -42,17 +41,11 @@ class SessionDBAuth(SessionExpAuth):
             return None
         try:
             user_session = UserSession.search({"session_id": session_id})
-            if self.session_duration <= 0:
+            if self.session_duration <= 0 and self.idle_timeout <= 0:
                 return user_session[0].user_id
-            session_dictionary = self.user_id_by_session_id.get(
-                session_id, None)
-            if session_dictionary is None:
+            if session_id not in self.user_id_by_session_id:
                 return None
-            created_at = session_dictionary.get("created_at", None)
-            if created_at is None:
-                return None
-            duration = created_at + timedelta(seconds=self.session_duration)
-            if duration < datetime.now():
+            if super().user_id_for_session_id(session_id) is None:
                 return None
             return user_session[0].user_id
         except Exception:
@@ -74,7 +67,8 @@ class SessionDBAuth(SessionExpAuth):
         try:
             user_session = UserSession.search({"session_id": session_id})
             user_session[0].remove()
-            del self.user_id_by_session_id[session_id]
+            # Evicted by the sweeper if it expired
+            self.user_id_by_session_id.pop(session_id, None)
             return True
         except Exception:
             return False
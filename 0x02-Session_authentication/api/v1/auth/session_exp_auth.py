@@ -3,23 +3,46 @@
 Session Expiration Authentication System Management.
 """
 from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_store import SessionStore
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 
 
 class SessionExpAuth(SessionAuth):
     """
     Session Expiration Authentication System Manager.
+
+    Sessions expire SESSION_DURATION seconds after their creation and,
+    in sliding mode, SESSION_IDLE_TIMEOUT seconds after their last use.
+    The last use is recorded at most once per SESSION_REFRESH_INTERVAL
+    seconds (default: a tenth of the idle timeout), so hot sessions
+    aren't written on every request.
     """
     def __init__(self):
         """
         Initializes SessionExpAuth instance attributes.
+
+        Sessions are kept in a SessionStore of this instance, which
+        evicts them once expired.
         """
         try:
             session_duration = int(os.getenv("SESSION_DURATION"))
         except Exception:
             session_duration = 0
         self.session_duration = session_duration
+        try:
+            idle_timeout = float(os.getenv("SESSION_IDLE_TIMEOUT", "0"))
+        except ValueError:
+            idle_timeout = 0
+        self.idle_timeout = idle_timeout
+        try:
+            refresh_interval = float(os.getenv("SESSION_REFRESH_INTERVAL"))
+        except Exception:
+            refresh_interval = idle_timeout / 10
+        self.refresh_interval = refresh_interval
+        self.user_id_by_session_id = SessionStore(session_duration,
+                                                  idle_timeout)
 
     def create_session(self, user_id=None):
         """
@@ -31,10 +54,14 @@ class SessionExpAuth(SessionAuth):
         session_id = super().create_session(user_id)
         if not session_id:
             return None
+        now = time.monotonic()
         session_dictionary = {
             'user_id': user_id,
-            'created_at': datetime.now()
+            'created_at': datetime.now(),
+            'created': now
         }
+        if self.idle_timeout > 0:
+            session_dictionary['last_access'] = now
         self.user_id_by_session_id[session_id] = session_dictionary
         return session_id
 
@@ -51,12 +78,16 @@ class SessionExpAuth(SessionAuth):
         if session_dictionary is None:
             return None
         user_id = session_dictionary.get('user_id')
-        if self.session_duration <= 0:
+        if self.session_duration <= 0 and self.idle_timeout <= 0:
             return user_id
-        created_at = session_dictionary.get('created_at', None)
-        if created_at is None:
-            return None
-        duration = created_at + timedelta(seconds=self.session_duration)
-        if duration < datetime.now():
+        expires_at = self.user_id_by_session_id.expires_at(
+            session_dictionary)
+        now = time.monotonic()
+        if expires_at is not None and expires_at < now:
             return None
+        if self.idle_timeout > 0:
+            last_access = session_dictionary.get('last_access')
+            if last_access is None or \
+                    now - last_access >= self.refresh_interval:
+                session_dictionary['last_access'] = now
         return user_id
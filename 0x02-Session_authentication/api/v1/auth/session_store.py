@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Expiring Session Store Management.
+"""
+from datetime import datetime
+import heapq
+import os
+import threading
+import time
+import weakref
+
+
+# Seconds between two sweeps of the expired sessions
+try:
+    SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "1"))
+except ValueError:
+    SWEEP_INTERVAL = 1.0
+# Weak references to the stores swept by the background thread
+_STORES = []
+_SWEEPER = None
+_LOCK = threading.Lock()
+
+
+class SessionStore(dict):
+    """
+    Session dictionaries by session ID, evicted once expired.
+
+    Sessions set through `store[session_id] = session` are pushed on a
+    heap ordered by expiry, so a sweep only visits expired sessions.
+    A background thread sweeps every store every SWEEP_INTERVAL seconds.
+
+    Expiry dates are `time.monotonic()` values: a session expires
+    `duration` seconds after its `created` date, or `idle_timeout`
+    seconds after its `last_access` date.
+    """
+    def __init__(self, duration: int = 0, idle_timeout: float = 0):
+        """
+        Initializes SessionStore instance attributes.
+
+        Arguments:
+            - `duration`: session lifetime in seconds, no expiry if <= 0.
+            - `idle_timeout`: seconds without access after which a
+            session expires, no idle expiry if <= 0.
+        """
+        super().__init__()
+        self.duration = duration
+        self.idle_timeout = idle_timeout
+        self.evicted = 0
+        self.sweeps = 0
+        self.last_sweep_seconds = 0.0
+        self._heap = []
+        self._lock = threading.Lock()
+        if duration > 0 or idle_timeout > 0:
+            _register(self)
+
+    def __setitem__(self, session_id: str, session):
+        """
+        Stores `session` and schedules its expiry.
+        """
+        with self._lock:
+            super().__setitem__(session_id, session)
+            expires_at = self.expires_at(session)
+            if expires_at is not None:
+                heapq.heappush(self._heap, (expires_at, session_id))
+
+    def expires_at(self, session) -> float:
+        """
+        Returns the monotonic expiry date of `session`, None if it never
+        expires, or -inf if it has no creation date.
+        """
+        if type(session) is not dict:
+            return None
+        expires_at = None
+        if self.duration > 0:
+            created = session.get('created')
+            if created is None:
+                created_at = session.get('created_at')
+                if created_at is None:
+                    return float('-inf')
+                # Session built without a monotonic date
+                created = time.monotonic() - \
+                    (datetime.now() - created_at).total_seconds()
+                session['created'] = created
+            expires_at = created + self.duration
+        if self.idle_timeout > 0 and 'last_access' in session:
+            idle_expires_at = session['last_access'] + self.idle_timeout
+            if expires_at is None or idle_expires_at < expires_at:
+                expires_at = idle_expires_at
+        return expires_at
+
+    def sweep(self, now: float = None) -> int:
+        """
+        Evicts the expired sessions and returns how many there were.
+
+        Arguments:
+            - `now`: current date, `time.monotonic()` by default.
+        """
+        start = time.perf_counter()
+        if now is None:
+            now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] < now:
+                expires_at, session_id = heapq.heappop(self._heap)
+                session = self.get(session_id)
+                if session is None:
+                    # Destroyed since
+                    continue
+                current = self.expires_at(session)
+                if current == expires_at or \
+                        (current is not None and current < now):
+                    self.pop(session_id, None)
+                    evicted += 1
+                elif current is not None:
+                    # Session extended in place: schedule its new expiry
+                    heapq.heappush(self._heap, (current, session_id))
+            self.evicted += evicted
+            self.sweeps += 1
+            self.last_sweep_seconds = time.perf_counter() - start
+        return evicted
+
+    def stats(self) -> dict:
+        """
+        Returns the session count and the eviction metrics.
+        """
+        return {
+            'sessions': len(self),
+            'scheduled_expiries': len(self._heap),
+            'evicted': self.evicted,
+            'sweeps': self.sweeps,
+            'last_sweep_seconds': self.last_sweep_seconds,
+        }
+
+
+def _register(store: SessionStore):
+    """
+    Adds `store` to the stores swept by the background thread, starting
+    the thread if needed.
+    """
+    global _SWEEPER
+    with _LOCK:
+        _STORES.append(weakref.ref(store))
+        if _SWEEPER is None or not _SWEEPER.is_alive():
+            _SWEEPER = threading.Thread(target=_sweep_loop,
+                                        name="session-sweeper", daemon=True)
+            _SWEEPER.start()
+
+
+def _sweep_loop():
+    """
+    Sweeps every registered store every SWEEP_INTERVAL seconds.
+    """
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        with _LOCK:
+            _STORES[:] = [ref for ref in _STORES if ref() is not None]
+            stores = [ref() for ref in _STORES]
+        for store in stores:
+            if store is not None:
+                store.sweep()
@@ -18,11 +18,22 @@ def status() -> str:
 def stats() -> str:
     """ GET /api/v1/stats
     Return:
-      - the number of each objects
+      - the number of each objects, and of sessions
+      - the counters of each model class, see `Base.stats`
     """
+    from api.v1.app import auth
     from models.user import User
+    from models.user_session import UserSession
     stats = {}
     stats['users'] = User.count()
+    stats['sessions'] = UserSession.count()
+    sessions = getattr(auth, 'user_id_by_session_id', None)
+    if sessions is not None:
+        stats['active_sessions'] = len(sessions)
+    if hasattr(sessions, 'stats'):
+        stats['session_store'] = sessions.stats()
+    stats['models'] = {cls.__name__: cls.stats()
+                       for cls in (User, UserSession)}
     return jsonify(stats)
 
 
@@ -2,18 +2,68 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, request, Response
 from models.user import User
+from urllib.parse import urlencode
+
+
+# Largest page a client may request with `limit`
+MAX_PAGE_SIZE = 1000
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - limit (optional): number of User objects per page, at most
+        MAX_PAGE_SIZE
+      - cursor (optional): ID of the last User object of the previous page
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, ordered by ID: all of them,
+        streamed, without `limit`
+      - the next cursor in the X-Next-Cursor header if there are more
+      - 400 if `limit` isn't valid
+    """
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit')
+    if limit is None:
+        return Response(_render_array(User.iterate(cursor)),
+                        mimetype='application/json')
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return jsonify({'error': "limit must be between 1 and {}"
+                        .format(MAX_PAGE_SIZE)}), 400
+    users = User.page(cursor, limit + 1)
+    response = Response(_render_array(users[:limit]),
+                        mimetype='application/json')
+    if len(users) > limit:
+        next_cursor = users[limit - 1].id
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = '<{}?{}>; rel="next"'.format(
+            request.base_url,
+            urlencode({'limit': limit, 'cursor': next_cursor}))
+    return response
+
+
+def _render_array(objs, chunk_size: int = 500):
+    """ Stream the cached JSON texts of `objs` as a JSON array,
+    `chunk_size` objects per chunk
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    chunk = []
+    separator = '['
+    for obj in objs:
+        chunk.append(obj.to_json_text())
+        if len(chunk) == chunk_size:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+        separator = ','
+    yield ('[' if separator == '[' else '') + ']\n'
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+""" Benchmark of Auth.require_auth with many excluded paths: the former
+loop over the list vs a compiled PathMatcher
+"""
+import sys
+import time
+from api.v1.auth.auth import Auth, PathMatcher
+
+
+def require_auth_loop(path: str, excluded_paths: list) -> bool:
+    """ Former implementation of Auth.require_auth
+    """
+    if path is None:
+        return True
+    if not excluded_paths:
+        return True
+    for x_path in excluded_paths:
+        if x_path.endswith('*'):
+            end = x_path.split('/')[-1][:-1]
+            if end in path:
+                return False
+    if not path.endswith('/'):
+        path += '/'
+    if path in excluded_paths:
+        return False
+    return True
+
+
+def run(patterns: int, lookups: int = 20000):
+    """ Print the mean require_auth latency with `patterns` excluded
+    paths, a tenth of them wildcards
+    """
+    excluded_paths = []
+    for i in range(patterns):
+        if i % 10 == 0:
+            excluded_paths.append("/api/v1/public{}*".format(i))
+        else:
+            excluded_paths.append("/api/v1/resource{}/".format(i))
+    paths = ["/api/v1/resource{}".format(i) for i in range(0, patterns, 7)]
+    paths += ["/api/v1/public{}/x".format(i) for i in range(0, patterns, 10)]
+    paths += ["/admin/public{}".format(i) for i in range(0, patterns, 10)]
+    paths += ["/api/v1/users/{}".format(i) for i in range(100)]
+    auth = Auth()
+    matcher = PathMatcher(excluded_paths)
+    for path in paths:
+        slashed = path if path.endswith('/') else path + '/'
+        excluded = any(slashed.startswith(x[:-1]) if x.endswith('*')
+                       else slashed == x for x in excluded_paths)
+        assert auth.require_auth(path, matcher) is not excluded
+    # The former wildcard check tests whether the part after the last
+    # '/' occurs anywhere in the path: '/api/v1/public0*' also excludes
+    # '/admin/public0'
+    wrong = sum(require_auth_loop(path, excluded_paths) !=
+                auth.require_auth(path, matcher) for path in paths)
+    candidates = (paths * (lookups // len(paths) + 1))[:lookups]
+
+    start = time.perf_counter()
+    for path in candidates:
+        require_auth_loop(path, excluded_paths)
+    t_loop = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    for path in candidates:
+        auth.require_auth(path, matcher)
+    t_matcher = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    for path in candidates:
+        auth.require_auth(path, excluded_paths)
+    t_list = (time.perf_counter() - start) / lookups
+
+    print("{:>5} patterns: loop {:7.2f} us ({} of {} wrong), "
+          "matcher {:5.2f} us, list (cached matcher) {:5.2f} us".format(
+              patterns, t_loop * 1e6, wrong, len(paths), t_matcher * 1e6,
+              t_list * 1e6))
+
+
+if __name__ == "__main__":
+    for patterns in [int(a) for a in sys.argv[1:]] or [4, 100, 500, 2000]:
+        run(patterns)
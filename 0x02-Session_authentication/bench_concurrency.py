@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+""" Stress benchmark of concurrent User reads and writes: readers scan
+snapshots while writers save and remove users, and must never fail or
+miss a user that isn't being written
+"""
+import sys
+import threading
+import time
+from models.json_engine import DATA
+from models.user import User
+import models.json_engine as json_engine
+
+
+def writer(stop: threading.Event, errors: list):
+    """ Save and remove users until `stop` is set
+    """
+    try:
+        while not stop.is_set():
+            user = User(email="temp@hbtn.io")
+            user.save()
+            user.remove()
+    except Exception as e:
+        errors.append(e)
+
+
+def reader(stop: threading.Event, errors: list, counts: list,
+           base_ids: set, scan):
+    """ Scan all users until `stop` is set, checking that none of
+    `base_ids` is missing
+    """
+    reads = 0
+    try:
+        while not stop.is_set():
+            ids = {user.id for user in scan()}
+            if not base_ids <= ids:
+                raise AssertionError("missing users")
+            reads += 1
+    except Exception as e:
+        errors.append(e)
+    counts.append(reads)
+
+
+def live_scan() -> list:
+    """ Scan of the live dict, as `search` used to do
+    """
+    return [user for user in DATA['User'].values()]
+
+
+def run(readers: int, scan=User.all, size: int = 10000,
+        duration: float = 1.0) -> tuple:
+    """ Return the reads per second and the errors of `readers` reader
+    threads running next to one writer thread
+    """
+    base_ids = set()
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i))
+        DATA['User'][user.id] = user
+        base_ids.add(user.id)
+    User.reindex()
+    json_engine._changed('User')
+    stop = threading.Event()
+    errors = []
+    counts = []
+    threads = [threading.Thread(target=writer, args=(stop, errors))]
+    threads += [threading.Thread(target=reader, args=(
+        stop, errors, counts, base_ids, scan)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    DATA['User'] = {}
+    json_engine._changed('User')
+    return sum(counts) / duration, errors
+
+
+if __name__ == "__main__":
+    # Skip the journal: this measures the store, not the disk
+    json_engine._append_journal = lambda cls, record: None
+    # Switch threads often to expose races
+    sys.setswitchinterval(1e-5)
+    DATA['User'] = {}
+    reads, errors = run(2, live_scan)
+    print("live dict:  {} errors, e.g. {!r}".format(
+        len(errors), errors[0] if errors else None))
+    for readers in [int(a) for a in sys.argv[1:]] or [1, 2, 4, 8]:
+        reads, errors = run(readers)
+        print("snapshots: {} readers, {:8.1f} scans/s, {} errors".format(
+            readers, reads, len(errors)))
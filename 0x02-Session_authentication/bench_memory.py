@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+""" Benchmark of the memory held per User and UserSession instance:
+__dict__-backed attributes (previous layout) vs __slots__
+"""
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+from models.user import User
+from models.user_session import UserSession
+
+
+class DictUser():
+    """ Previous User layout: same attributes in a per-instance __dict__
+    """
+
+    def __init__(self):
+        """ Initialize a DictUser instance
+        """
+        self.id = str(uuid.uuid4())
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.email = None
+        self._password = None
+        self.first_name = None
+        self.last_name = None
+
+
+class DictUserSession():
+    """ Previous UserSession layout
+    """
+
+    def __init__(self):
+        """ Initialize a DictUserSession instance
+        """
+        self.id = str(uuid.uuid4())
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.user_id = None
+        self.session_id = None
+
+
+def bytes_per_object(factory, n: int) -> float:
+    """ Mean memory allocated per object created by `factory`
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [factory() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return (after - before) / n
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name, before, after in (("User", DictUser, User),
+                                ("UserSession", DictUserSession,
+                                 UserSession)):
+        print("{:<12} __dict__ {:6.0f} B/object, __slots__ {:6.0f} B/object"
+              .format(name, bytes_per_object(before, n),
+                      bytes_per_object(after, n)))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+""" Benchmark of prefix, range and ordered User.search: full scan vs the
+access path picked by the planner
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from models.json_engine import DATA
+from models.user import User
+import models.json_engine as json_engine
+
+
+def timed(fn, rounds: int = 20) -> float:
+    """ Mean duration of `fn()` in milliseconds
+    """
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+def run(size: int):
+    """ Print the mean query latency with `size` users
+    """
+    DATA['User'] = {}
+    t0 = datetime(2020, 1, 1)
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i),
+                    created_at=(t0 + timedelta(seconds=i)).isoformat())
+        DATA['User'][user.id] = user
+    User.reindex()
+    json_engine._changed('User')
+    users = list(DATA['User'].values())
+    low = t0 + timedelta(seconds=size // 2)
+    high = low + timedelta(seconds=100)
+    queries = {
+        'prefix': (
+            lambda: [u for u in users if u.email.startswith("user123@")],
+            {'prefix': {'email': "user123@"}}),
+        'range': (
+            lambda: [u for u in users if low <= u.created_at < high],
+            {'ranges': {'created_at': (low, high)}}),
+        'latest 10': (
+            lambda: sorted(users, key=lambda u: u.created_at,
+                           reverse=True)[:10],
+            {'order_by': 'created_at', 'descending': True, 'limit': 10}),
+    }
+    for name, (scan, kwargs) in queries.items():
+        assert len(scan()) == len(User.search(**kwargs))
+        print("{:>8} users, {:>9}: scan {:9.2f} ms, {} {:7.3f} ms".format(
+            size, name, timed(scan), User.explain(**kwargs)['access'],
+            timed(lambda: User.search(**kwargs))))
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 100000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+""" Benchmark of the request latency of the API through Flask's test
+client, and of the number of `current_user` resolutions per request
+"""
+import base64
+import os
+import sys
+import time
+os.environ.setdefault("AUTH_TYPE", "basic_auth")
+from api.v1 import app as app_module  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def run(path: str, headers: dict, requests: int = 2000):
+    """ Print the mean latency of GET `path`
+    """
+    client = app_module.app.test_client()
+    auth = app_module.auth
+    calls = [0]
+    current_user = auth.current_user
+
+    def counted(request=None):
+        calls[0] += 1
+        return current_user(request)
+
+    auth.current_user = counted
+    client.get(path, headers=headers)
+    calls[0] = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        status = client.get(path, headers=headers).status_code
+    elapsed = time.perf_counter() - start
+    del auth.current_user
+    print("{:>20} {}: {:7.1f} us/request, {:.1f} current_user/request"
+          .format(path, status, elapsed / requests * 1e6,
+                  calls[0] / requests))
+
+
+if __name__ == "__main__":
+    user = User(email="bench@hbtn.io")
+    user.password = "pwd"
+    user.save()
+    credentials = base64.b64encode(b"bench@hbtn.io:pwd").decode()
+    headers = {"Authorization": "Basic " + credentials}
+    for path in sys.argv[1:] or ["/api/v1/status", "/api/v1/users/me"]:
+        run(path, headers)
+    user.remove()
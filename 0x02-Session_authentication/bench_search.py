@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+""" Benchmark of User.search by email: full scan vs secondary index
+"""
+import sys
+import time
+from models.json_engine import DATA
+from models.user import User
+import models.json_engine as json_engine
+
+
+def scan(email: str) -> list:
+    """ Original linear search
+    """
+    return [u for u in DATA['User'].values() if u.email == email]
+
+
+def run(size: int, lookups: int = 1000):
+    """ Print the mean lookup latency with `size` users
+    """
+    DATA['User'] = {}
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i))
+        DATA['User'][user.id] = user
+    User.reindex()
+    json_engine._changed('User')
+    emails = ["user{}@hbtn.io".format(i * size // lookups)
+              for i in range(lookups)]
+    scan_lookups = max(1, lookups * 1000 // size)
+
+    start = time.perf_counter()
+    for email in emails[:scan_lookups]:
+        assert len(scan(email)) == 1
+    t_scan = (time.perf_counter() - start) / scan_lookups
+
+    start = time.perf_counter()
+    for email in emails:
+        assert len(User.search({"email": email})) == 1
+    t_index = (time.perf_counter() - start) / lookups
+
+    print("{:>9} users: scan {:10.1f} us, index {:6.1f} us".format(
+        size, t_scan * 1e6, t_index * 1e6))
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 100000, 1000000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+""" Benchmark of SessionExpAuth.user_id_for_session_id: the former
+datetime arithmetic vs monotonic timestamps, fixed and sliding expiry
+"""
+import os
+import time
+from datetime import datetime, timedelta
+os.environ.setdefault("SESSION_DURATION", "3600")
+from api.v1.auth.session_exp_auth import SessionExpAuth  # noqa: E402
+
+
+def user_id_datetime(auth: SessionExpAuth, session_id: str) -> str:
+    """ Former implementation of user_id_for_session_id
+    """
+    session_dictionary = auth.user_id_by_session_id.get(session_id, None)
+    if session_dictionary is None:
+        return None
+    user_id = session_dictionary.get('user_id')
+    if auth.session_duration <= 0:
+        return user_id
+    created_at = session_dictionary.get('created_at', None)
+    if created_at is None:
+        return None
+    duration = created_at + timedelta(seconds=auth.session_duration)
+    if duration < datetime.now():
+        return None
+    return user_id
+
+
+def timed(fn, lookups: int = 200000) -> float:
+    """ Mean duration of `fn()` in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(lookups):
+        fn()
+    return (time.perf_counter() - start) / lookups * 1e6
+
+
+if __name__ == "__main__":
+    auth = SessionExpAuth()
+    session_id = auth.create_session("user")
+    print("datetime:          {:.2f} us".format(
+        timed(lambda: user_id_datetime(auth, session_id))))
+    print("monotonic:         {:.2f} us".format(
+        timed(lambda: auth.user_id_for_session_id(session_id))))
+    auth.idle_timeout = 1800
+    auth.refresh_interval = 60
+    auth.user_id_by_session_id.idle_timeout = 1800
+    session_id = auth.create_session("user")
+    print("monotonic sliding: {:.2f} us".format(
+        timed(lambda: auth.user_id_for_session_id(session_id))))
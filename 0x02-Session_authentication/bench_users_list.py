@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+""" Benchmark of the GET /api/v1/users body: jsonify of fresh to_json
+dicts vs streaming the cached JSON texts
+"""
+import json
+import sys
+import time
+from api.v1.views.users import _render_array
+from models.json_engine import DATA
+from models.user import User
+import models.json_engine as json_engine
+
+
+def run(size: int, rounds: int = 5):
+    """ Print the mean time to render `size` users
+    """
+    DATA['User'] = {}
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i), first_name="Bob")
+        DATA['User'][user.id] = user
+    User.reindex()
+    json_engine._changed('User')
+    users = User.all()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for user in users:
+            object.__setattr__(user, '_cache', None)
+        json.dumps([user.to_json() for user in users])
+    t_cold = (time.perf_counter() - start) / rounds
+
+    ''.join(_render_array(users))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ''.join(_render_array(users))
+    t_warm = (time.perf_counter() - start) / rounds
+
+    print("{:>8} users: to_json {:8.1f} ms, cached {:8.1f} ms".format(
+        size, t_cold * 1e3, t_warm * 1e3))
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+""" Main 5: journal replay after a crash with a torn last record
+"""
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+
+os.chdir(tempfile.mkdtemp())
+from models.user import User  # noqa: E402
+
+""" A process saves users, then is killed in the middle of a record """
+subprocess.run([sys.executable, "-c", """
+import os, signal
+from models.user import User
+User.load_from_file()
+for email in ("a@hbtn.io", "b@hbtn.io", "c@hbtn.io"):
+    User(email=email).save()
+user = User.search({"email": "b@hbtn.io"})[0]
+user.first_name = "Bob"
+user.save()
+User.search({"email": "c@hbtn.io"})[0].remove()
+with open(".db_User.journal", "a") as f:
+    f.write('{"op": "save", "id": "torn", "obj": {"ema')
+os.kill(os.getpid(), signal.SIGKILL)
+"""], env=dict(os.environ, PYTHONPATH=sys.path[0]))
+
+User.load_from_file()
+print("Users: {}".format(sorted(u.email for u in User.all())))
+print("Bob: {}".format(User.search({"email": "b@hbtn.io"})[0].first_name))
+print("Torn record ignored: {}".format(User.get("torn") is None))
+
+""" Saves after the torn record are replayed too """
+User(email="d@hbtn.io").save()
+User.load_from_file()
+print("Users: {}".format(sorted(u.email for u in User.all())))
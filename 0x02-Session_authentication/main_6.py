@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+""" Main 6: journal replay after an interrupted compaction
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+os.chdir(tempfile.mkdtemp())
+from models.user import User  # noqa: E402
+
+""" A process rotates its journal, then is killed before writing the
+snapshot """
+crash = """
+import os, signal, sys
+import models.json_engine as json_engine
+from models.user import User
+User.load_from_file()
+for email in sys.argv[1:]:
+    User(email=email).save()
+json_engine.write_atomic = lambda *args: os.kill(os.getpid(),
+                                                 signal.SIGKILL)
+User.save_to_file()
+"""
+env = dict(os.environ, PYTHONPATH=sys.path[0])
+subprocess.run([sys.executable, "-c", crash, "a@hbtn.io", "b@hbtn.io"],
+               env=env)
+print("Files: {}".format(sorted(os.listdir("."))))
+User.load_from_file()
+print("Users: {}".format(sorted(u.email for u in User.all())))
+
+""" A second interrupted compaction appends to the rotated journal """
+subprocess.run([sys.executable, "-c", crash, "c@hbtn.io"], env=env)
+print("Files: {}".format(sorted(os.listdir("."))))
+User.load_from_file()
+print("Users: {}".format(sorted(u.email for u in User.all())))
+
+""" A complete compaction folds everything into the snapshot """
+User(email="d@hbtn.io").save()
+User.save_to_file()
+print("Files: {}".format(sorted(os.listdir("."))))
+User.load_from_file()
+print("Users: {}".format(sorted(u.email for u in User.all())))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+""" Main 7: shared store reloads (MODELS_SHARED=1)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+os.chdir(tempfile.mkdtemp())
+os.environ["MODELS_SHARED"] = "1"
+import models.json_engine as json_engine  # noqa: E402
+from models.user import User  # noqa: E402
+
+env = dict(os.environ, PYTHONPATH=sys.path[0])
+
+
+def other_process(code: str):
+    """ Run `code` in another process sharing the store """
+    subprocess.run([sys.executable, "-c",
+                    "from models.user import User\n"
+                    "User.load_from_file()\n" + code], env=env, check=True)
+
+
+User.load_from_file()
+for email in ("a@hbtn.io", "b@hbtn.io"):
+    User(email=email).save()
+
+""" Records appended by another process are replayed, without reload """
+load_stats = json_engine.LOAD_STATS["User"]
+other_process("User(email='c@hbtn.io').save()\n"
+              "User.search({'email': 'a@hbtn.io'})[0].remove()")
+print("Users: {}".format(sorted(u.email for u in User.all())))
+print("Reloaded: {}".format(json_engine.LOAD_STATS["User"] is not load_stats))
+
+""" Own saves keep up with the other process """
+User(email="d@hbtn.io").save()
+other_process("User(email='e@hbtn.io').save()")
+print("Count: {}".format(User.count()))
+
+""" A compaction by another process replaces the snapshot: full reload """
+other_process("User.save_to_file()\nUser(email='f@hbtn.io').save()")
+print("Users: {}".format(sorted(u.email for u in User.all())))
+print("Reloaded: {}".format(json_engine.LOAD_STATS["User"] is not load_stats))
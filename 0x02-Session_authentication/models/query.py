@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" Query module: search criteria shared by the storage engines
+"""
+from datetime import datetime
+from typing import Iterable, List, TypeVar
+
+
+class Query():
+    """ Criteria of `Base.search`
+
+    - `attributes`: attribute values to match exactly
+    - `prefix`: string attribute prefixes, e.g. {"email": "bob@"}
+    - `ranges`: (start, end) bounds of attributes, start included and end
+      excluded; either may be None
+    - `order_by`, `descending`: sort order, objects without a value last
+    - `limit`: maximum number of objects returned
+    """
+
+    def __init__(self, attributes: dict = None, prefix: dict = None,
+                 ranges: dict = None, order_by: str = None,
+                 descending: bool = False, limit: int = None):
+        """ Initialize a Query
+        """
+        self.attributes = attributes or {}
+        self.prefix = prefix or {}
+        self.ranges = ranges or {}
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = limit
+
+    def bounds(self) -> dict:
+        """ (low, high) bounds per attribute of the prefix and range
+        criteria, low included and high excluded
+        """
+        result = {}
+        for attr, value in self.prefix.items():
+            if value:
+                result[attr] = (value, prefix_end(value))
+        for attr, (start, end) in self.ranges.items():
+            low, high = result.get(attr, (None, None))
+            if start is not None and (low is None or start > low):
+                low = start
+            if end is not None and (high is None or end < high):
+                high = end
+            result[attr] = (low, high)
+        return result
+
+    def matches(self, obj: TypeVar('Base')) -> bool:
+        """ Whether `obj` meets every criterion
+        """
+        for k, v in self.attributes.items():
+            if stored(getattr(obj, k)) != v:
+                return False
+        for k, v in self.prefix.items():
+            value = getattr(obj, k, None)
+            if type(value) is not str or not value.startswith(v):
+                return False
+        for k, (start, end) in self.ranges.items():
+            value = stored(getattr(obj, k, None))
+            if value is None:
+                return False
+            try:
+                if start is not None and value < start:
+                    return False
+                if end is not None and not value < end:
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def finish(self, objs: Iterable[TypeVar('Base')],
+               ordered: bool = False) -> List[TypeVar('Base')]:
+        """ Filter `objs`, then sort them unless they are already
+        `ordered`, and apply the limit
+        """
+        if ordered or self.order_by is None:
+            result = []
+            for obj in objs:
+                if self.limit is not None and len(result) >= self.limit:
+                    break
+                if self.matches(obj):
+                    result.append(obj)
+            return result
+        result = [obj for obj in objs if self.matches(obj)]
+        valued = [obj for obj in result
+                  if getattr(obj, self.order_by, None) is not None]
+        valued.sort(key=lambda obj: getattr(obj, self.order_by),
+                    reverse=self.descending)
+        if len(valued) < len(result):
+            valued.extend(obj for obj in result
+                          if getattr(obj, self.order_by, None) is None)
+        return valued[:self.limit] if self.limit is not None else valued
+
+
+def prefix_end(prefix: str) -> str:
+    """ Smallest string greater than every string starting with `prefix`,
+    or None if there is none
+    """
+    if ord(prefix[-1]) == 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def stored(value):
+    """ `value` at the precision it is stored with: datetimes lose their
+    microseconds, which TIMESTAMP_FORMAT doesn't keep
+    """
+    if type(value) is datetime and value.microsecond:
+        return value.replace(microsecond=0)
+    return value
+
+
+def sort_key(value):
+    """ Key of `value` in a sorted index: datetimes become ISO 8601
+    strings, so they compare with the timestamps of raw JSON dicts
+    """
+    if type(value) is datetime:
+        return value.isoformat()
+    return value
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+""" Stats module: per-class counters of the model events of this process
+"""
+import threading
+import time
+
+
+# Width in seconds of the sliding window of the event rates
+RATE_WINDOW = 60
+
+
+class RateCounter():
+    """ Number of events in the last `window` seconds, counted in one
+    bucket per second so that recording an event is O(1)
+    """
+
+    def __init__(self, window: int = RATE_WINDOW):
+        """ Initialize a RateCounter
+        """
+        self.window = window
+        self.seconds = [None] * window
+        self.counts = [0] * window
+
+    def add(self, now: float = None):
+        """ Record one event
+        """
+        second = int(time.monotonic() if now is None else now)
+        i = second % self.window
+        if self.seconds[i] != second:
+            self.seconds[i] = second
+            self.counts[i] = 0
+        self.counts[i] += 1
+
+    def per_minute(self, now: float = None) -> float:
+        """ Events per minute over the window
+        """
+        second = int(time.monotonic() if now is None else now)
+        total = sum(count for s, count in zip(self.seconds, self.counts)
+                    if s is not None and second - s < self.window)
+        return total * 60 / self.window
+
+
+class ClassStats():
+    """ Events of one model class since this process started
+    """
+
+    def __init__(self):
+        """ Initialize a ClassStats
+        """
+        self.created = 0
+        self.updated = 0
+        self.removed = 0
+        self.created_rate = RateCounter()
+        self.removed_rate = RateCounter()
+
+    def to_json(self) -> dict:
+        """ Counters and rates as a JSON dictionary
+        """
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'removed': self.removed,
+            'created_per_minute': self.created_rate.per_minute(),
+            'removed_per_minute': self.removed_rate.per_minute(),
+        }
+
+
+# CLASS_STATS[class name] holds the ClassStats of a model class
+CLASS_STATS = {}
+_LOCK = threading.Lock()
+
+
+def class_stats(s_class: str) -> ClassStats:
+    """ ClassStats of `s_class`, created on first use
+    """
+    stats = CLASS_STATS.get(s_class)
+    if stats is None:
+        with _LOCK:
+            stats = CLASS_STATS.setdefault(s_class, ClassStats())
+    return stats
+
+
+def record_save(s_class: str, created: bool):
+    """ Count the creation or the update of an object of `s_class`
+    """
+    stats = class_stats(s_class)
+    with _LOCK:
+        if created:
+            stats.created += 1
+            stats.created_rate.add()
+        else:
+            stats.updated += 1
+
+
+def record_remove(s_class: str):
+    """ Count the removal of an object of `s_class`
+    """
+    stats = class_stats(s_class)
+    with _LOCK:
+        stats.removed += 1
+        stats.removed_rate.add()
@@ -9,6 +9,9 @@ class UserSession(Base):
     """
     User Session ID Storage Manager.
     """
+    __slots__ = ('user_id', 'session_id')
+    INDEXED = ('session_id',)
+
     def __init__(self, *args: list, **kwargs: dict):
         """
         Initializes UserSession instance attributes.